@@ -61,6 +61,9 @@ class ChatViewModel(application: Application) : AndroidViewModel(application) {
     // Currently streaming assistant message ID (for the active page)
     private var streamingMessageId: String? = null
 
+    // User message showing interim (is_final = false) transcripts, replaced by the final one
+    private var partialTranscriptId: String? = null
+
     init {
         audioPlayer.initialize()
 
@@ -164,6 +167,7 @@ class ChatViewModel(application: Application) : AndroidViewModel(application) {
             s.copy(pages = pages)
         }
         streamingMessageId = null
+        partialTranscriptId = null
         wsClient.sendJson(SelectWorkspaceMsg(name = name))
     }
 
@@ -183,6 +187,7 @@ class ChatViewModel(application: Application) : AndroidViewModel(application) {
             }
         }
         streamingMessageId = null
+        partialTranscriptId = null
 
         _uiState.update { it.copy(activePageIndex = index) }
 
@@ -210,9 +215,7 @@ class ChatViewModel(application: Application) : AndroidViewModel(application) {
 
     private fun handleServerMessage(json: String) {
         when (val msg = parseServerMessage(json)) {
-            is ServerMessage.Transcription -> {
-                addUserMessage(msg.msg.text)
-            }
+            is ServerMessage.Transcription -> handleTranscription(msg.msg)
 
             is ServerMessage.ResponseDelta -> {
                 updateActivePage { it.copy(isResponding = true) }
@@ -285,6 +288,27 @@ class ChatViewModel(application: Application) : AndroidViewModel(application) {
         }
     }
 
+    private fun handleTranscription(msg: TranscriptionMsg) {
+        val id = partialTranscriptId
+        if (!msg.isFinal) {
+            if (id != null) {
+                updateActiveMessage(id) { it.copy(text = msg.text) }
+            } else {
+                val newMsg = ChatMessage(role = Role.USER, text = msg.text, isStreaming = true)
+                partialTranscriptId = newMsg.id
+                addMessage(newMsg)
+            }
+            return
+        }
+
+        partialTranscriptId = null
+        when {
+            id == null -> if (msg.text.isNotBlank()) addUserMessage(msg.text)
+            msg.text.isBlank() -> removeActiveMessage(id)
+            else -> updateActiveMessage(id) { it.copy(text = msg.text, isStreaming = false) }
+        }
+    }
+
     private fun addUserMessage(text: String, imageUri: Uri? = null) {
         addMessage(ChatMessage(role = Role.USER, text = text, imageUri = imageUri))
     }
@@ -307,6 +331,12 @@ class ChatViewModel(application: Application) : AndroidViewModel(application) {
         }
     }
 
+    private fun removeActiveMessage(id: String) {
+        updateActivePage { page ->
+            page.copy(messages = page.messages.filterNot { it.id == id })
+        }
+    }
+
     private fun updateActivePage(transform: (ChatPage) -> ChatPage) {
         _uiState.update { state ->
             val pages = state.pages.toMutableList()
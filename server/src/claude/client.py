@@ -2,23 +2,180 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import TYPE_CHECKING, AsyncIterator
+import re
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, AsyncIterator, Iterable
 
 import anthropic
 
-from .system_prompt import SYSTEM_PROMPT, workspace_system_prompt
-from .tools import TOOLS
-from .tool_executor import ToolExecutor
+from .system_prompt import workspace_system_prompt
+from .tools import CACHED_TOOLS
+from .tool_executor import READ_ONLY_TOOLS, ToolExecutor
 
 if TYPE_CHECKING:
-    from ..ws.session import Session
+    from ..ws.session import Msg, Session
 
 log = logging.getLogger(__name__)
 
 # Max tool-use loop iterations to prevent infinite loops
 MAX_TOOL_ROUNDS = 15
 
+# Exact-match cache for tool-free replies to short repeated utterances
+RESPONSE_CACHE_SIZE = 64
+RESPONSE_CACHE_TTL = 300  # seconds
+RESPONSE_CACHE_MAX_CHARS = 200  # longer user messages are never cached
+
+_NORMALIZE_RE = re.compile(r"[^\w\s']+")
+
+# Tool results older than the previous user turn are cut to this many chars
+MAX_OLD_TOOL_RESULT_CHARS = 4000
+
+# Evicted history is summarized once this many messages have piled up
+SUMMARY_MIN_MESSAGES = 10
+SUMMARY_MAX_TOKENS = 512
+SUMMARY_BLOCK_CHARS = 500  # per content block in the transcript to summarize
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a voice coding session that is too long "
+    "to keep in full. Merge the earlier summary (if any) with the transcript "
+    "excerpt into one updated summary of at most ~200 words. Keep decisions, "
+    "file paths, commands, open tasks and user preferences; drop small talk. "
+    "Reply with the summary text only."
+)
+
+
+def _is_turn_start(message: dict) -> bool:
+    """True for a user message that isn't a tool-result reply."""
+    if message["role"] != "user":
+        return False
+    content = message["content"]
+    return isinstance(content, str) or not any(
+        block.get("type") == "tool_result" for block in content
+    )
+
+
+def _trim_old_tool_results(
+    history: Iterable[Msg],
+    keep_head: int = 2,
+    max_chars: int = MAX_OLD_TOOL_RESULT_CHARS,
+) -> list[dict]:
+    """Build API messages from history, shortening long tool results from
+    before the previous user turn (except in the first few messages).
+
+    The boundary only moves when a user turn starts, so every round of a
+    turn sends the same prefix and the prompt cache keeps hitting; a result
+    is sent in full for two turns and truncated from then on.
+
+    Leading messages left over from a turn whose start was evicted from the
+    history are dropped, since the API needs the first message to be a user
+    turn. Returns a new list; trimmed messages are copies, so session
+    history keeps the full results.
+    """
+    messages = [msg.as_dict() for msg in history]
+    turn_starts = [i for i, msg in enumerate(messages) if _is_turn_start(msg)]
+    if not turn_starts:
+        return []
+    del messages[:turn_starts[0]]
+    boundary = turn_starts[-2] - turn_starts[0] if len(turn_starts) > 1 else 0
+    trimmed = list(messages)
+    for i in range(keep_head, boundary):
+        content = messages[i]["content"]
+        if not isinstance(content, list):
+            continue
+        new_content = []
+        changed = False
+        for block in content:
+            body = block.get("content")
+            if block.get("type") == "tool_result" and isinstance(body, str) and len(body) > max_chars:
+                block = {**block, "content": body[:max_chars] + "\n... (truncated, see earlier turn)"}
+                changed = True
+            new_content.append(block)
+        if changed:
+            trimmed[i] = {**messages[i], "content": new_content}
+    return trimmed
+
+
+def _mark_message_for_caching(messages: list[dict]) -> list[dict]:
+    """Return messages with a cache breakpoint on the last content block.
+
+    The marked message and block are copies: content blocks are shared with
+    the session history, and a marker left behind there would pile up past
+    the API's limit of 4 breakpoints (system + tools use two).
+    """
+    if not messages:
+        return messages
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    if not content:
+        return messages
+    marked = [*content[:-1], {**content[-1], "cache_control": {"type": "ephemeral"}}]
+    return [*messages[:-1], {**last, "content": marked}]
+
+
+def _response_cache_key(session: Session) -> tuple | None:
+    """Cache key for the pending user turn, or None if it isn't cacheable.
+
+    Only a session's opening turn is cached, and only if it is short and
+    text-only: a later reply depends on the conversation before it.
+    """
+    conversation = session.conversation
+    if len(conversation) != 1 or session.summary:
+        return None
+    content = conversation[0].content
+    if isinstance(content, str):
+        text = content
+    elif all(block.get("type") == "text" for block in content):
+        text = " ".join(block["text"] for block in content)
+    else:
+        return None
+    if len(text) > RESPONSE_CACHE_MAX_CHARS:
+        return None
+    normalized = " ".join(_NORMALIZE_RE.sub(" ", text.lower()).split())
+    if not normalized:
+        return None
+    return (session.workspace_name, normalized)
+
+
+def _render_for_summary(messages: Iterable[Msg]) -> str:
+    """Flatten messages into a plain transcript for the summarizer."""
+    lines = []
+    for msg in messages:
+        content = msg.content
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        for block in content:
+            kind = block.get("type")
+            if kind == "text":
+                text = block["text"]
+            elif kind == "tool_use":
+                text = f"[tool {block['name']}: {block['input']}]"
+            elif kind == "tool_result":
+                text = f"[tool result: {block.get('content', '')}]"
+            else:
+                text = f"[{kind}]"
+            lines.append(f"{msg.role}: {text[:SUMMARY_BLOCK_CHARS]}")
+    return "\n".join(lines)
+
+
+def _tool_batches(blocks: list) -> list[list]:
+    """Group tool_use blocks into batches that may run concurrently.
+
+    Consecutive read-only tools share a batch; any other tool gets a batch
+    of its own, so side effects stay ordered relative to the reads around it.
+    """
+    batches: list[list] = []
+    for block in blocks:
+        if block.name in READ_ONLY_TOOLS and batches and batches[-1][-1].name in READ_ONLY_TOOLS:
+            batches[-1].append(block)
+        else:
+            batches.append([block])
+    return batches
+
 
 class ClaudeClient:
     """Manages Claude API calls with streaming and tool use."""
@@ -29,11 +186,63 @@ class ClaudeClient:
         model: str,
         max_tokens: int,
         tool_executor: ToolExecutor,
+        summary_model: str = "",
     ) -> None:
         self.client = anthropic.AsyncAnthropic(api_key=api_key)
         self.model = model
         self.max_tokens = max_tokens
         self.executor = tool_executor
+        self.summary_model = summary_model
+        # cache key -> (stored_at, assistant text blocks), in LRU order
+        self._response_cache: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+
+    def _cached_response(self, key: tuple | None) -> list[dict] | None:
+        if key is None:
+            return None
+        entry = self._response_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, content = entry
+        if time.monotonic() - stored_at > RESPONSE_CACHE_TTL:
+            del self._response_cache[key]
+            return None
+        self._response_cache.move_to_end(key)
+        return [{"type": "text", "text": block["text"]} for block in content]
+
+    def _store_response(self, key: tuple | None, content: list[dict]) -> None:
+        if key is None or not content:
+            return
+        blocks = [{"type": "text", "text": block["text"]} for block in content]
+        self._response_cache[key] = (time.monotonic(), blocks)
+        self._response_cache.move_to_end(key)
+        if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+
+    async def summarize_evicted(self, session: Session) -> None:
+        """Fold messages evicted from the session history into its summary.
+
+        Runs once enough evicted messages have accumulated. On failure the
+        batch is dropped and the previous summary kept.
+        """
+        if not self.summary_model or len(session.evicted) < SUMMARY_MIN_MESSAGES:
+            return
+        batch, session.evicted = session.evicted, []
+        prompt = _render_for_summary(batch)
+        if session.summary:
+            prompt = f"Earlier summary:\n{session.summary}\n\nTranscript:\n{prompt}"
+        try:
+            reply = await self.client.messages.create(
+                model=self.summary_model,
+                max_tokens=SUMMARY_MAX_TOKENS,
+                system=SUMMARY_SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        except Exception:
+            log.exception("History summary failed for session %s", session.session_id)
+            return
+        summary = "".join(block.text for block in reply.content if block.type == "text")
+        if summary.strip():
+            session.summary = summary.strip()
 
     async def stream_response(
         self, session: Session, executor: ToolExecutor | None = None
@@ -52,8 +261,29 @@ class ClaudeClient:
           {"type": "response_complete"}
         """
         active_executor = executor or self.executor
-        messages = list(session.conversation)
+        # Memoized reads only live for one user turn: files may have been
+        # edited outside the tools since the last one
+        active_executor.clear_memo_cache()
+        cache_key = _response_cache_key(session)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            log.info("Response cache hit for session %s", session.session_id)
+            for block in cached:
+                yield {"type": "text_delta", "text": block["text"]}
+            yield {"type": "text_done"}
+            session.add_assistant_message(cached)
+            yield {"type": "response_complete"}
+            return
+
+        messages = _trim_old_tool_results(session.conversation)
         system_prompt = workspace_system_prompt(session.workspace_name)
+        if session.summary:
+            # After the cached workspace prompt, so that prefix still hits
+            system_prompt = [*system_prompt, {
+                "type": "text",
+                "text": "Summary of earlier conversation no longer shown:\n"
+                        f"<summary>\n{session.summary}\n</summary>",
+            }]
 
         for _round in range(MAX_TOOL_ROUNDS):
             if session.interrupted:
@@ -61,40 +291,24 @@ class ClaudeClient:
 
             # Collect the full response (text blocks + tool_use blocks)
             assistant_content: list[dict] = []
-            text_so_far = ""
-            tool_uses: list[dict] = []
+            saw_text = False
 
             async with self.client.messages.stream(
                 model=self.model,
                 max_tokens=self.max_tokens,
                 system=system_prompt,
-                messages=messages,
-                tools=TOOLS,
+                messages=_mark_message_for_caching(messages),
+                tools=CACHED_TOOLS,
             ) as stream:
                 async for event in stream:
                     if session.interrupted:
                         return
 
-                    if event.type == "content_block_start":
-                        if event.content_block.type == "text":
-                            text_so_far = ""
-                        elif event.content_block.type == "tool_use":
-                            tool_uses.append({
-                                "id": event.content_block.id,
-                                "name": event.content_block.name,
-                                "input_json": "",
-                            })
-
-                    elif event.type == "content_block_delta":
-                        if event.delta.type == "text_delta":
-                            text_so_far += event.delta.text
-                            yield {"type": "text_delta", "text": event.delta.text}
-                        elif event.delta.type == "input_json_delta":
-                            if tool_uses:
-                                tool_uses[-1]["input_json"] += event.delta.partial_json
-
-                    elif event.type == "content_block_stop":
-                        pass
+                    # Tool inputs are taken from the final message, so only
+                    # text deltas need handling here.
+                    if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        saw_text = True
+                        yield {"type": "text_delta", "text": event.delta.text}
 
                 # Get the final message
                 final = await stream.get_final_message()
@@ -116,52 +330,69 @@ class ClaudeClient:
                         "input": block.input,
                     })
 
-            if text_so_far:
+            if saw_text:
                 yield {"type": "text_done"}
 
             if not has_tool_use:
                 # No tools — we're done
                 if assistant_content:
                     messages.append({"role": "assistant", "content": assistant_content})
-                    session.conversation.append({"role": "assistant", "content": assistant_content})
+                    session.add_assistant_message(assistant_content)
+                    if _round == 0:
+                        # Side-effect free (no tools ran), safe to replay
+                        self._store_response(cache_key, assistant_content)
                 yield {"type": "response_complete"}
                 return
 
             # Execute tools and continue the loop
             messages.append({"role": "assistant", "content": assistant_content})
-            session.conversation.append({"role": "assistant", "content": assistant_content})
+            session.add_assistant_message(assistant_content)
 
             tool_results = []
-            for block in final.content:
-                if block.type != "tool_use":
-                    continue
-
-                yield {
-                    "type": "tool_use",
-                    "tool_name": block.name,
-                    "tool_id": block.id,
-                    "input": block.input,
-                }
-
-                result = await active_executor.execute(block.name, block.input)
-
-                yield {
-                    "type": "tool_result",
-                    "tool_id": block.id,
-                    "tool_name": block.name,
-                    "success": result["success"],
-                    "output": result["output"],
-                }
-
-                tool_results.append({
+            tool_blocks = [block for block in final.content if block.type == "tool_use"]
+            try:
+                for batch in _tool_batches(tool_blocks):
+                    for block in batch:
+                        yield {
+                            "type": "tool_use",
+                            "tool_name": block.name,
+                            "tool_id": block.id,
+                            "input": block.input,
+                        }
+
+                    results = await asyncio.gather(*(
+                        active_executor.execute(block.name, block.input) for block in batch
+                    ))
+                    # Recorded before yielding, so a consumer that stops
+                    # here doesn't lose results of tools that already ran
+                    tool_results.extend({
+                        "type": "tool_result",
+                        "tool_use_id": block.id,
+                        "content": result["output"],
+                        "is_error": not result["success"],
+                    } for block, result in zip(batch, results))
+
+                    for block, result in zip(batch, results):
+                        yield {
+                            "type": "tool_result",
+                            "tool_id": block.id,
+                            "tool_name": block.name,
+                            "success": result["success"],
+                            "output": result["output"],
+                        }
+            finally:
+                # The tool_use message is already in the history, and the API
+                # rejects one without a result for every call. Tools that a
+                # cancellation or interrupt cut short get an error result.
+                answered = {result["tool_use_id"] for result in tool_results}
+                tool_results.extend({
                     "type": "tool_result",
                     "tool_use_id": block.id,
-                    "content": result["output"],
-                    "is_error": not result["success"],
-                })
-
-            messages.append({"role": "user", "content": tool_results})
-            session.conversation.append({"role": "user", "content": tool_results})
+                    "content": "Interrupted before the tool finished",
+                    "is_error": True,
+                } for block in tool_blocks if block.id not in answered)
+                messages.append({"role": "user", "content": tool_results})
+                session.add_user_parts(tool_results)
 
             # Loop continues — Claude will respond to tool results
 
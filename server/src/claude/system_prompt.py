@@ -2,12 +2,21 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 
-def workspace_system_prompt(workspace_name: str | None = None) -> str:
-    """Return the system prompt, optionally scoped to a workspace."""
+
+@lru_cache(maxsize=32)
+def workspace_system_prompt(workspace_name: str | None = None) -> list[dict]:
+    """Return the system prompt blocks, optionally scoped to a workspace.
+
+    The single text block carries a cache breakpoint so the prompt prefix is
+    reused across tool rounds. Results are cached per workspace and shared,
+    so callers must not mutate them.
+    """
+    text = SYSTEM_PROMPT
     if workspace_name:
-        return f"You are currently working in the **{workspace_name}** project.\n\n{SYSTEM_PROMPT}"
-    return SYSTEM_PROMPT
+        text = f"You are currently working in the **{workspace_name}** project.\n\n{SYSTEM_PROMPT}"
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
 
 
 SYSTEM_PROMPT = """\
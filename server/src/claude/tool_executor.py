@@ -4,26 +4,73 @@ from __future__ import annotations
 
 import asyncio
 import glob as glob_module
+import hashlib
+import json
 import logging
 import os
 import re
+import signal
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
+from typing import Iterator
 
-from ..utils.safety import PathSandbox, check_command_safety
+from ..utils.safety import PathSandbox, check_command_safety, compile_blocked_patterns
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 log = logging.getLogger(__name__)
 
 # Max output size to return to Claude (chars)
 MAX_OUTPUT = 50_000
 
+# Side-effect-free tools: results can be memoized and calls run concurrently
+READ_ONLY_TOOLS = frozenset({"read_file", "glob", "list_directory", "grep"})
+
+# Max memoized results per executor
+MEMO_SIZE = 128
+
+# Directories never descended into by glob/grep
+PRUNE_DIRS = frozenset({".git", "node_modules", "__pycache__", "dist", "build"})
+
+# Files larger than this are skipped by grep
+GREP_MAX_FILE_SIZE = 2 * 1024 * 1024
+
+# Files scanned concurrently per grep batch
+GREP_BATCH = 64
+
+# Shared pool for glob/grep directory walks and grep file scans
+_GREP_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="grep")
+
+# Per-thread Hyperscan scratch space for the grep pool
+_hs_local = threading.local()
+
 
 class ToolExecutor:
     """Execute Claude tools within a sandboxed workspace."""
 
-    def __init__(self, sandbox: PathSandbox, blocked_commands: list[str], command_timeout: int = 30) -> None:
+    def __init__(
+        self,
+        sandbox: PathSandbox,
+        blocked_commands: list[str],
+        command_timeout: int = 30,
+        memoize: bool = False,
+    ) -> None:
         self.sandbox = sandbox
         self.blocked_commands = blocked_commands
+        self._blocked_re = compile_blocked_patterns(blocked_commands)
         self.command_timeout = command_timeout
+        self.memoize = memoize
+        # (tool_name, input hash) -> (scope path, result), in LRU order.
+        # Callers clear it per user turn (ClaudeClient.stream_response).
+        self._memo: OrderedDict[tuple[str, str], tuple[Path, dict]] = OrderedDict()
+        # Bumped on every mutating tool so in-flight reads don't store stale results
+        self._memo_generation = 0
 
     async def execute(self, tool_name: str, tool_input: dict) -> dict:
         """Execute a tool and return {"success": bool, "output": str}."""
@@ -31,33 +78,67 @@ class ToolExecutor:
             handler = getattr(self, f"_tool_{tool_name}", None)
             if handler is None:
                 return {"success": False, "output": f"Unknown tool: {tool_name}"}
-            result = await handler(tool_input)
-            return result
+
+            if not self.memoize:
+                return await handler(tool_input)
+
+            if tool_name in READ_ONLY_TOOLS:
+                key = (tool_name, _input_hash(tool_input))
+                cached = self._memo.get(key)
+                if cached is not None:
+                    self._memo.move_to_end(key)
+                    return cached[1]
+                generation = self._memo_generation
+                result = await handler(tool_input)
+                if result["success"] and generation == self._memo_generation:
+                    scope = self.sandbox.resolve(tool_input.get("path", ""))
+                    self._memo[key] = (scope, result)
+                    if len(self._memo) > MEMO_SIZE:
+                        self._memo.popitem(last=False)
+                return result
+
+            try:
+                return await handler(tool_input)
+            finally:
+                self._invalidate_memo(tool_name, tool_input)
         except ValueError as e:
             return {"success": False, "output": f"Safety error: {e}"}
         except Exception as e:
             log.exception("Tool %s failed", tool_name)
             return {"success": False, "output": f"Error: {e}"}
 
-    async def _tool_read_file(self, inp: dict) -> dict:
-        path = self.sandbox.resolve(inp["path"])
-        if not path.is_file():
-            return {"success": False, "output": f"File not found: {inp['path']}"}
+    def clear_memo_cache(self) -> None:
+        """Drop all memoized tool results."""
+        self._memo.clear()
+        self._memo_generation += 1
 
-        text = path.read_text(errors="replace")
-        lines = text.splitlines(keepends=True)
+    def _invalidate_memo(self, tool_name: str, tool_input: dict) -> None:
+        """Drop memoized results that a mutating tool may have made stale."""
+        if tool_name not in ("write_file", "edit_file"):
+            # bash can touch anything
+            self.clear_memo_cache()
+            return
 
-        offset = inp.get("offset")
-        limit = inp.get("limit")
-        if offset is not None:
-            start = max(0, offset - 1)  # 1-based to 0-based
-            lines = lines[start:]
-        if limit is not None:
-            lines = lines[:limit]
+        self._memo_generation += 1
+        try:
+            written = self.sandbox.resolve(tool_input["path"])
+        except (KeyError, ValueError):
+            return
+        stale = [
+            key for key, (scope, _) in self._memo.items()
+            if scope == written or scope in written.parents
+        ]
+        for key in stale:
+            del self._memo[key]
 
-        output = "".join(lines)
-        if len(output) > MAX_OUTPUT:
-            output = output[:MAX_OUTPUT] + f"\n... (truncated, {len(text)} total chars)"
+    async def _tool_read_file(self, inp: dict) -> dict:
+        path = self.sandbox.resolve(inp["path"])
+        # File I/O runs on a thread so concurrent tool calls actually overlap
+        output = await asyncio.to_thread(
+            _read_file, path, inp.get("offset"), inp.get("limit")
+        )
+        if output is None:
+            return {"success": False, "output": f"File not found: {inp['path']}"}
         return {"success": True, "output": output}
 
     async def _tool_write_file(self, inp: dict) -> dict:
@@ -89,10 +170,11 @@ class ToolExecutor:
         command = inp["command"]
         timeout = inp.get("timeout", self.command_timeout)
 
-        blocked = check_command_safety(command, self.blocked_commands)
+        blocked = check_command_safety(command, self.blocked_commands, self._blocked_re)
         if blocked:
             return {"success": False, "output": f"Blocked command pattern: {blocked}"}
 
+        proc = None
         try:
             proc = await asyncio.create_subprocess_shell(
                 command,
@@ -100,6 +182,8 @@ class ToolExecutor:
                 stderr=asyncio.subprocess.STDOUT,
                 cwd=str(self.sandbox.root),
                 env={**os.environ, "HOME": str(Path.home())},
+                # Own process group, so a kill reaches the shell's children
+                start_new_session=True,
             )
             stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout)
             output = stdout.decode(errors="replace")
@@ -114,8 +198,13 @@ class ToolExecutor:
             return {"success": True, "output": output}
 
         except asyncio.TimeoutError:
-            proc.kill()
+            _kill_process_group(proc)
             return {"success": False, "output": f"Command timed out after {timeout}s"}
+        except asyncio.CancelledError:
+            # The response was interrupted; don't leave the command running
+            if proc is not None:
+                _kill_process_group(proc)
+            raise
 
     async def _tool_glob(self, inp: dict) -> dict:
         pattern = inp["pattern"]
@@ -125,10 +214,20 @@ class ToolExecutor:
         else:
             search_dir = self.sandbox.root
 
-        matches = sorted(
-            str(p.relative_to(self.sandbox.root))
-            for p in search_dir.glob(pattern)
-            if p.is_file()
+        # Leading literal segments are a path, not something to search for
+        segments = pattern.split("/")
+        n_literal = 0
+        while n_literal < len(segments) - 1 and not _is_wildcard(segments[n_literal]):
+            n_literal += 1
+        if n_literal:
+            search_dir = self.sandbox.resolve(
+                os.path.join(base, *segments[:n_literal])
+            )
+        rest = "/".join(segments[n_literal:])
+
+        loop = asyncio.get_running_loop()
+        matches = await loop.run_in_executor(
+            _GREP_POOL, _glob_files, search_dir, rest, self.sandbox.root
         )
 
         if not matches:
@@ -150,43 +249,53 @@ class ToolExecutor:
             search_path = self.sandbox.root
 
         try:
-            regex = re.compile(pattern)
+            # Scan raw bytes so non-matching files are never decoded
+            regex = re.compile(pattern.encode(), re.MULTILINE)
         except re.error as e:
             return {"success": False, "output": f"Invalid regex: {e}"}
+        hs_db = _compile_hyperscan(pattern.encode())
 
         max_results = 200
         root = self.sandbox.root
 
-        def _search_sync() -> list[str]:
+        loop = asyncio.get_running_loop()
+        if search_path.is_file():
+            results = await loop.run_in_executor(
+                _GREP_POOL, _search_file, search_path, regex, root, hs_db
+            )
+        else:
+            include_re = None
+            if include:
+                include = include.removeprefix("**/")
+                include_re = _glob_to_regex(include)
+            candidates = (
+                Path(entry.path)
+                for entry, rel in _walk_files(
+                    search_path, skip_hidden=True, prune=_prune_dirs_for(include or "")
+                )
+                if (include_re is None
+                    or include_re.fullmatch(rel if "/" in include else entry.name))
+                and entry.stat().st_size <= GREP_MAX_FILE_SIZE
+            )
+            # Walk lazily in batches and scan each batch across the pool, so
+            # the event loop stays free and we stop once enough hits are in.
             results = []
-
-            def _search_file(fpath: Path) -> list[str]:
-                hits = []
-                try:
-                    text = fpath.read_text(errors="replace")
-                    for i, line in enumerate(text.splitlines(), 1):
-                        if regex.search(line):
-                            rel = str(fpath.relative_to(root))
-                            hits.append(f"{rel}:{i}: {line}")
-                except (OSError, UnicodeDecodeError):
-                    pass
-                return hits
-
-            if search_path.is_file():
-                results = _search_file(search_path)
-            else:
-                glob_pat = include or "**/*"
-                for fpath in search_path.glob(glob_pat):
-                    if fpath.is_file() and not any(
-                        part.startswith(".") for part in fpath.parts
-                    ):
-                        results.extend(_search_file(fpath))
-                        if len(results) >= max_results:
-                            break
-            return results
-
-        loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(None, _search_sync)
+            while len(results) < max_results:
+                batch = await loop.run_in_executor(
+                    _GREP_POOL, _take, candidates, GREP_BATCH
+                )
+                if not batch:
+                    break
+                hits = await asyncio.gather(*(
+                    loop.run_in_executor(
+                        _GREP_POOL, _search_file, fpath, regex, root, hs_db
+                    )
+                    for fpath in batch
+                ))
+                for file_hits in hits:
+                    results.extend(file_hits)
+                    if len(results) >= max_results:
+                        break
 
         if not results:
             return {"success": True, "output": "No matches found"}
@@ -203,14 +312,258 @@ class ToolExecutor:
         else:
             dir_path = self.sandbox.root
 
-        if not dir_path.is_dir():
+        entries = await asyncio.to_thread(_list_directory, dir_path)
+        if entries is None:
             return {"success": False, "output": f"Not a directory: {base or '.'}"}
 
-        entries = []
-        for item in sorted(dir_path.iterdir()):
-            if item.name.startswith("."):
-                continue
-            suffix = "/" if item.is_dir() else ""
-            entries.append(f"{item.name}{suffix}")
-
         return {"success": True, "output": "\n".join(entries) if entries else "(empty directory)"}
+
+
+def _read_file(path: Path, offset: int | None, limit: int | None) -> str | None:
+    """Read a file (or a 1-based line window of it) for read_file.
+
+    Returns None if path is not a file.
+    """
+    if not path.is_file():
+        return None
+
+    size = path.stat().st_size
+    if offset is None and limit is None:
+        # Whole file: never read more than we can return
+        with path.open("rb") as f:
+            output = f.read(MAX_OUTPUT).decode(errors="replace")
+        truncated = size > MAX_OUTPUT
+    else:
+        # Line window: stream lines and stop at the end of the window
+        start = max(0, offset - 1) if offset is not None else 0  # 1-based to 0-based
+        stop = start + limit if limit is not None else None
+        with path.open("r", errors="replace") as f:
+            output = "".join(islice(f, start, stop))
+        truncated = len(output) > MAX_OUTPUT
+
+    if truncated:
+        output = output[:MAX_OUTPUT] + f"\n... (truncated, {size} total bytes)"
+    return output
+
+
+def _list_directory(dir_path: Path) -> list[str] | None:
+    """Visible entries of dir_path, directories suffixed with "/".
+
+    Returns None if dir_path is not a directory.
+    """
+    if not dir_path.is_dir():
+        return None
+    # scandir gives file types from the directory read, no stat per entry
+    with os.scandir(dir_path) as it:
+        items = sorted(
+            (item for item in it if not item.name.startswith(".")),
+            key=lambda item: item.name,
+        )
+    return [f"{item.name}{'/' if item.is_dir() else ''}" for item in items]
+
+
+def _kill_process_group(proc: asyncio.subprocess.Process) -> None:
+    """Kill a process started with start_new_session, and its children."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass  # already exited
+
+
+def _is_wildcard(segment: str) -> bool:
+    return any(c in segment for c in "*?[")
+
+
+def _prune_dirs_for(pattern: str) -> frozenset[str]:
+    """PRUNE_DIRS minus any directory the glob names literally ("build/*")."""
+    named = {seg for seg in pattern.split("/") if not _is_wildcard(seg)}
+    return PRUNE_DIRS - named
+
+
+def _glob_files(top: Path, pattern: str, root: Path) -> list[str]:
+    """Sorted paths, relative to root, of files under top matching pattern.
+
+    Without "**" the walk stops at the depth the pattern reaches, so "*.py"
+    reads only top itself.
+    """
+    if not top.is_dir():
+        return []
+    max_depth = None if "**" in pattern else pattern.count("/")
+    pattern_re = _glob_to_regex(pattern)
+    return sorted(
+        str(Path(entry.path).relative_to(root))
+        for entry, rel in _walk_files(
+            top, prune=_prune_dirs_for(pattern), max_depth=max_depth
+        )
+        if pattern_re.fullmatch(rel)
+    )
+
+
+def _walk_files(
+    top: Path,
+    skip_hidden: bool = False,
+    prune: frozenset[str] = PRUNE_DIRS,
+    max_depth: int | None = None,
+) -> Iterator[tuple[os.DirEntry, str]]:
+    """Yield (entry, posix path relative to top) for files under top.
+
+    Uses os.scandir so file types come from the directory read itself, and
+    prunes directories named in prune (and hidden entries if skip_hidden)
+    without descending. Directories more than max_depth levels below top
+    are not read. Symlinked directories are not followed.
+    """
+    stack = [(str(top), "", 0)]
+    while stack:
+        dirpath, prefix, depth = stack.pop()
+        descend = max_depth is None or depth < max_depth
+        try:
+            with os.scandir(dirpath) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if skip_hidden and entry.name.startswith("."):
+                continue
+            rel = prefix + entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if descend and entry.name not in prune:
+                        subdirs.append((entry.path, rel + "/", depth + 1))
+                elif entry.is_file():
+                    yield entry, rel
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+
+def _glob_to_regex(pattern: str) -> re.Pattern[str]:
+    """Translate a glob ("**" spans directories, "*" does not) to a regex."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end]
+            negate = body.startswith("!")
+            if negate:
+                body = body[1:]
+            body = "".join(c if c == "-" else re.escape(c) for c in body)
+            parts.append(f"[{'^' if negate else ''}{body}]")
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(parts))
+
+
+def _take(it, n: int) -> list:
+    """Pull up to n items from an iterator."""
+    return list(islice(it, n))
+
+
+def _compile_hyperscan(pattern: bytes):
+    """Compile pattern into a Hyperscan prefilter database, or None."""
+    if hyperscan is None:
+        return None
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=[pattern],
+            ids=[0],
+            elements=1,
+            flags=[hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_SINGLEMATCH],
+        )
+    except Exception:
+        # Unsupported construct (backreferences, lookaround, empty matches...)
+        return None
+    return db
+
+
+def _hyperscan_matches(db, data: bytes) -> bool:
+    """True if db matches anywhere in data; stops at the first match."""
+    # Scratch space is per-thread; grep scans files on several pool threads
+    if getattr(_hs_local, "db", None) is not db:
+        _hs_local.db = db
+        _hs_local.scratch = hyperscan.Scratch(db)
+
+    found = False
+
+    def on_match(_id, _start, _end, _flags, _context):
+        nonlocal found
+        found = True
+        return True  # halt the scan
+
+    try:
+        db.scan(data, match_event_handler=on_match, scratch=_hs_local.scratch)
+    except hyperscan.ScanTerminated:
+        pass
+    return found
+
+
+def _search_file(
+    fpath: Path, regex: re.Pattern[bytes], root: Path, hs_db=None
+) -> list[str]:
+    """Return "path:line: text" hits for regex in one file, one per line.
+
+    With hs_db, Hyperscan only decides whether the file matches at all; the
+    hits themselves always come from regex.
+    """
+    hits = []
+    try:
+        with open(fpath, "rb") as f:
+            data = f.read()
+    except OSError:
+        return hits
+    if b"\0" in data[:4096]:
+        return hits  # binary
+    if b"\r\n" in data:
+        # "$" only matches before "\n"; a CRLF line must look like any other
+        data = data.replace(b"\r\n", b"\n")
+    if hs_db is not None and not _hyperscan_matches(hs_db, data):
+        return hits
+
+    rel = str(fpath.relative_to(root))
+    size = len(data)
+    line_no = 1
+    counted = 0
+    pos = 0
+    while pos < size:
+        m = regex.search(data, pos)
+        if m is None:
+            break
+        start = m.start()
+        if start == size and data.endswith(b"\n"):
+            break  # empty match past the trailing newline
+        line_start = data.rfind(b"\n", 0, start) + 1
+        line_end = data.find(b"\n", start)
+        if line_end == -1:
+            line_end = size
+        # A match running past the line end (\s, [^x] and the like span
+        # newlines) only counts if the line matches on its own
+        if m.end() <= line_end or regex.search(data, line_start, line_end):
+            line_no += data.count(b"\n", counted, start)
+            counted = start
+            line = data[line_start:line_end].rstrip(b"\r").decode(errors="replace")
+            hits.append(f"{rel}:{line_no}: {line}")
+        # One hit per line: resume on the next line
+        pos = line_end + 1
+    return hits
+
+
+def _input_hash(tool_input: dict) -> str:
+    """Stable hash of a tool input dict for memo keys."""
+    encoded = json.dumps(tool_input, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
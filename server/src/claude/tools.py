@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import copy
+
 TOOLS = [
     {
         "name": "read_file",
@@ -138,3 +140,9 @@ TOOLS = [
         },
     },
 ]
+
+# Tool list sent to the API: same schemas, with a cache breakpoint on the last
+# tool so the tool definitions are cached along with the system prompt. Built
+# once at import and passed by reference on every request.
+CACHED_TOOLS = copy.deepcopy(TOOLS)
+CACHED_TOOLS[-1]["cache_control"] = {"type": "ephemeral"}
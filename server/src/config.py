@@ -1,14 +1,25 @@
 from __future__ import annotations
 
-import json
 import os
+from functools import lru_cache
 from pathlib import Path
 
+import orjson
 import yaml
 from pydantic import BaseModel, field_validator
 from pydantic_settings import BaseSettings
 
 
+@lru_cache(maxsize=256)
+def _resolve(v: str) -> str:
+    """Expand ~ and resolve a configured path (cached per raw string)."""
+    return str(Path(v).expanduser().resolve())
+
+
+# libyaml-backed loader when PyYAML was built with it
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
 class ServerConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8765
@@ -18,11 +29,15 @@ class ClaudeConfig(BaseModel):
     model: str = "claude-sonnet-4-5-20250929"
     max_tokens: int = 8192
     max_conversation_turns: int = 50
+    summary_model: str = "claude-haiku-4-5-20251001"  # folds evicted turns; "" = off
 
 
 class STTConfig(BaseModel):
     model_size: str = "base.en"
     language: str = "en"
+    num_workers: int = 2
+    compute_type: str = "auto"
+    partial_interval: float = 0.8  # seconds of audio between interim transcripts; 0 = off
 
 
 class TTSConfig(BaseModel):
@@ -36,6 +51,7 @@ class AudioConfig(BaseModel):
     sample_rate: int = 16000
     channels: int = 1
     chunk_duration_ms: int = 100
+    max_recording_seconds: int = 30  # preallocated mic buffer; grows if exceeded
 
 
 class VADConfig(BaseModel):
@@ -56,7 +72,7 @@ class WorkspaceConfig(BaseModel):
     @field_validator("path")
     @classmethod
     def expand_path(cls, v: str) -> str:
-        return str(Path(v).expanduser().resolve())
+        return _resolve(v)
 
 
 class Settings(BaseSettings):
@@ -77,9 +93,10 @@ class Settings(BaseSettings):
     @field_validator("workspace_root")
     @classmethod
     def expand_workspace(cls, v: str) -> str:
-        return str(Path(v).expanduser().resolve())
+        return _resolve(v)
 
-    model_config = {"env_prefix": "WT_", "env_nested_delimiter": "__"}
+    # Frozen: one instance is shared by every session (see get_settings)
+    model_config = {"env_prefix": "WT_", "env_nested_delimiter": "__", "frozen": True}
 
 
 def load_settings(config_path: str | None = None) -> Settings:
@@ -92,7 +109,7 @@ def load_settings(config_path: str | None = None) -> Settings:
     path = Path(config_path)
     if path.exists():
         with open(path) as f:
-            data = yaml.safe_load(f) or {}
+            data = yaml.load(f, Loader=_YamlLoader) or {}
 
     # Pull API keys from standard env vars if not in config
     if "anthropic_api_key" not in data:
@@ -106,8 +123,8 @@ def load_settings(config_path: str | None = None) -> Settings:
     if settings.projws_path and not settings.workspaces:
         projws_file = Path(settings.projws_path).expanduser().resolve()
         if projws_file.exists():
-            with open(projws_file) as f:
-                projws = json.load(f)
+            with open(projws_file, "rb") as f:
+                projws = orjson.loads(f.read())
             for key, proj in projws.get("projects", {}).items():
                 cwd = proj.get("cwd")
                 if cwd:
@@ -117,3 +134,9 @@ def load_settings(config_path: str | None = None) -> Settings:
                     ))
 
     return settings
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """The process-wide settings, loaded from config.yaml/env on first use."""
+    return load_settings()
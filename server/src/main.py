@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+from pathlib import Path
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 
-from .config import load_settings
+from .config import get_settings
 from .claude.client import ClaudeClient
 from .claude.tool_executor import ToolExecutor
 from .utils.safety import PathSandbox
@@ -20,10 +22,10 @@ logging.basicConfig(
 )
 log = logging.getLogger(__name__)
 
-settings = load_settings()
+settings = get_settings()
 
 # Sandbox and tool executor
-sandbox = PathSandbox(settings.workspace_root)
+sandbox = PathSandbox(Path(settings.workspace_root))
 tool_executor = ToolExecutor(
     sandbox=sandbox,
     blocked_commands=settings.safety.blocked_commands,
@@ -36,6 +38,7 @@ claude_client = ClaudeClient(
     model=settings.claude.model,
     max_tokens=settings.claude.max_tokens,
     tool_executor=tool_executor,
+    summary_model=settings.claude.summary_model,
 )
 
 # STT engine (lazy-loaded)
@@ -45,6 +48,8 @@ try:
     stt_engine = WhisperSTT(
         model_size=settings.stt.model_size,
         language=settings.stt.language,
+        num_workers=settings.stt.num_workers,
+        compute_type=settings.stt.compute_type,
     )
     log.info("STT engine configured: Whisper %s", settings.stt.model_size)
 except ImportError:
@@ -71,10 +76,18 @@ sessions = SessionRegistry()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # uvicorn[standard] pulls in uvloop and httptools and picks them up
+    # automatically; log which loop we got so a fallback is visible
+    log.info("Event loop: %s", type(asyncio.get_running_loop()).__module__)
     cleanup_task = sessions.start_cleanup()
+    if stt_engine is not None:
+        try:
+            await asyncio.to_thread(stt_engine.warmup)
+        except Exception:
+            log.exception("STT warmup failed — model will load on first request")
     yield
     cleanup_task.cancel()
-    sessions.clear()
+    await sessions.clear()
 
 
 app = FastAPI(title="Walkie Talkie", version="0.1.0", lifespan=lifespan)
@@ -85,6 +98,7 @@ async def health():
     return {
         "status": "ok",
         "stt": stt_engine is not None,
+        "stt_backlog": stt_engine.backlog if stt_engine is not None else 0,
         "tts": tts_engine is not None,
         "active_sessions": len(sessions),
     }
@@ -111,7 +125,7 @@ async def websocket_endpoint(ws: WebSocket):
     try:
         await handler.handle()
     finally:
-        sessions.remove(session.session_id)
+        await sessions.remove(session.session_id)
         log.info("Session %s removed from registry", session.session_id)
 
 
@@ -9,6 +9,20 @@ class STTEngine(ABC):
     """Base class for speech-to-text engines."""
 
     @abstractmethod
-    async def transcribe(self, audio_data: bytes, sample_rate: int = 16000) -> str:
-        """Transcribe audio bytes (PCM s16le) to text."""
+    async def transcribe(
+        self, audio_data: bytes, sample_rate: int = 16000, partial: bool = False
+    ) -> str:
+        """Transcribe audio bytes (PCM s16le) to text.
+
+        partial asks for a quick interim pass over an utterance that is still
+        being recorded; engines may treat it like a normal transcription.
+        """
         ...
+
+    def warmup(self) -> None:
+        """Load models ahead of the first request. Optional; blocking."""
+
+    @property
+    def backlog(self) -> int:
+        """Transcriptions waiting for a worker. Engines without a queue report 0."""
+        return 0
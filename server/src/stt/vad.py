@@ -4,9 +4,12 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
+from ..utils.audio import pcm_to_float32
+
 log = logging.getLogger(__name__)
 
 
@@ -17,6 +20,17 @@ class SileroVAD:
         self.threshold = threshold
         self.sample_rate = sample_rate
         self._model = None
+        # Silero's native window: samples per model call
+        self._window = 512 if sample_rate == 16000 else 256
+        # Samples not yet fed to the model (less than one window)
+        self._pending = np.empty(0, dtype=np.float32)
+        # Reused model input tensor, allocated with the model
+        self._input = None
+        self._last_prob = 0.0
+        # One persistent inference thread keeps torch thread-local state warm
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="vad", initializer=_init_torch_thread
+        )
 
     def _get_model(self):
         if self._model is None:
@@ -27,31 +41,69 @@ class SileroVAD:
                 trust_repo=True,
             )
             self._model = model
+            self._input = torch.empty(self._window, dtype=torch.float32)
             log.info("Silero VAD model loaded")
         return self._model
 
     def detect_speech(self, audio_chunk: np.ndarray) -> float:
         """Return speech probability for an audio chunk.
 
+        Chunks of any length are buffered and the model runs once per full
+        native window; leftover samples carry over to the next call.
+
         Args:
             audio_chunk: float32 numpy array, values in [-1, 1]
 
         Returns:
-            Speech probability between 0 and 1.
+            Max speech probability over the windows completed by this chunk,
+            or the previous probability if no window completed.
         """
         import torch
 
         model = self._get_model()
-        tensor = torch.from_numpy(audio_chunk)
-        prob = model(tensor, self.sample_rate).item()
-        return float(prob)
+        samples = np.concatenate((self._pending, audio_chunk)) if len(self._pending) else audio_chunk
+        n_windows = len(samples) // self._window
+        if n_windows == 0:
+            self._pending = samples.astype(np.float32, copy=False)
+            return self._last_prob
+
+        probs = []
+        with torch.inference_mode():
+            for i in range(n_windows):
+                # Write through a numpy view of the reused tensor, no new tensor
+                self._input.numpy()[:] = samples[i * self._window:(i + 1) * self._window]
+                probs.append(model(self._input, self.sample_rate).item())
+        self._pending = samples[n_windows * self._window:].astype(np.float32)
+        self._last_prob = float(max(probs))
+        return self._last_prob
+
+    def detect_speech_bytes(self, pcm_data: bytes) -> float:
+        """Return speech probability for raw PCM s16le bytes.
+
+        Converts with a single float32 allocation, so callers holding mic
+        bytes don't need their own conversion.
+        """
+        return self.detect_speech(pcm_to_float32(pcm_data))
 
     async def detect_speech_async(self, audio_chunk: np.ndarray) -> float:
-        """Async wrapper for detect_speech."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.detect_speech, audio_chunk)
+        """Async wrapper for detect_speech, run on the dedicated VAD thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.detect_speech, audio_chunk)
+
+    async def detect_speech_bytes_async(self, pcm_data: bytes) -> float:
+        """Async wrapper for detect_speech_bytes, run on the dedicated VAD thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.detect_speech_bytes, pcm_data)
 
     def reset(self) -> None:
         """Reset VAD state between utterances."""
+        self._pending = np.empty(0, dtype=np.float32)
+        self._last_prob = 0.0
         if self._model is not None:
             self._model.reset_states()
+
+
+def _init_torch_thread() -> None:
+    """Limit intra-op threads; tiny VAD tensors only thrash a BLAS pool."""
+    import torch
+    torch.set_num_threads(1)
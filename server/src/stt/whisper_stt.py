@@ -5,58 +5,317 @@ from __future__ import annotations
 import asyncio
 import io
 import logging
-import wave
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
+
+from ..utils.audio import pcm_to_float32, pcm_to_wav
 from .base import STTEngine
 
 log = logging.getLogger(__name__)
 
+# Loaded models shared by all WhisperSTT instances, keyed by load options
+_MODELS: dict[tuple, object] = {}
+
+# While a transcription is running, others arriving within BATCH_WINDOW
+# seconds of each other are decoded together, up to MAX_BATCH at a time
+BATCH_WINDOW = 0.02
+MAX_BATCH = 8
+
+# faster-whisper's defaults for deciding a decode failed (retried at a higher
+# temperature) or heard no speech (dropped); the batched path checks its
+# results against the same values
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOG_PROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+# Longest utterance that fits one Whisper window and can be batched
+MAX_BATCH_SAMPLES = 30 * 16000
+
 
 class WhisperSTT(STTEngine):
     """Speech-to-text using faster-whisper."""
 
-    def __init__(self, model_size: str = "base.en", language: str = "en") -> None:
+    def __init__(
+        self,
+        model_size: str = "base.en",
+        language: str = "en",
+        num_workers: int = 2,
+        compute_type: str = "auto",
+    ) -> None:
         self.model_size = model_size
         self.language = language
+        self.num_workers = num_workers
+        self.compute_type = compute_type
         self._model = None
+        self._pipeline = None
+        # One thread per CTranslate2 worker so concurrent sessions actually
+        # overlap inside the model instead of queueing in the default pool
+        self._executor = ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="whisper"
+        )
+        # Interim passes get a thread of their own: one that is cancelled
+        # mid-decode keeps running, and must not occupy a final's worker
+        self._partial_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="whisper-partial"
+        )
+        # Pending (audio, future) pairs for the batcher, created on first use
+        self._queue: asyncio.Queue[tuple[np.ndarray, asyncio.Future]] | None = None
+        self._batcher: asyncio.Task | None = None
+        self._batch_tasks: set[asyncio.Task] = set()
+        # Final transcriptions (or batches being collected) not yet finished
+        self._in_flight = 0
+
+    @property
+    def backlog(self) -> int:
+        """Transcriptions waiting on the batcher or for a free worker thread."""
+        waiting = self._executor._work_queue.qsize()
+        if self._queue is not None:
+            waiting += self._queue.qsize()
+        return waiting
 
     def _get_model(self):
         if self._model is None:
-            from faster_whisper import WhisperModel
-            log.info("Loading Whisper model: %s", self.model_size)
-            self._model = WhisperModel(
-                self.model_size,
-                device="auto",
-                compute_type="auto",
-            )
-            log.info("Whisper model loaded")
+            compute_type = self._resolve_compute_type()
+            key = (self.model_size, self.num_workers, compute_type)
+            model = _MODELS.get(key)
+            if model is None:
+                from faster_whisper import WhisperModel
+                log.info("Loading Whisper model: %s (%s)", self.model_size, compute_type)
+                model = WhisperModel(
+                    self.model_size,
+                    device="auto",
+                    compute_type=compute_type,
+                    num_workers=self.num_workers,
+                )
+                _MODELS[key] = model
+                log.info("Whisper model loaded")
+            self._model = model
         return self._model
 
-    async def transcribe(self, audio_data: bytes, sample_rate: int = 16000) -> str:
-        """Transcribe PCM s16le audio to text."""
+    def _get_pipeline(self):
+        if self._pipeline is None:
+            from faster_whisper import BatchedInferencePipeline
+            self._pipeline = BatchedInferencePipeline(model=self._get_model())
+        return self._pipeline
+
+    def _resolve_compute_type(self) -> str:
+        """Pick int8 weights unless a compute type is configured explicitly.
+
+        CTranslate2's own "auto" picks float16 on GPU, which moves twice the
+        weight bytes of int8_float16 for no accuracy gain on short utterances.
+        """
+        if self.compute_type != "auto":
+            return self.compute_type
+        import ctranslate2
+        if ctranslate2.get_cuda_device_count() > 0:
+            return "int8_float16"
+        return "int8"
+
+    def warmup(self) -> None:
+        """Load the model and VAD, and run one transcription through both.
+
+        The first real request otherwise pays for model load, backend
+        initialization and the VAD filter load.
+        """
+        from faster_whisper.vad import get_speech_timestamps
+
+        model = self._get_model()
+        silence = np.zeros(16000, dtype=np.float32)
+        # The VAD would drop silence before the encoder and decoder ever ran,
+        # so it is loaded on its own and the transcription runs without it
+        get_speech_timestamps(silence)
+        segments, _info = model.transcribe(
+            silence,
+            language=self.language if self.language != "auto" else None,
+            vad_filter=False,
+        )
+        list(segments)  # segments are lazy; consume to actually run
+        log.info("Whisper model warmed up")
+
+    async def transcribe(
+        self, audio_data: bytes, sample_rate: int = 16000, partial: bool = False
+    ) -> str:
+        """Transcribe PCM s16le audio to text.
+
+        Partial passes decode greedily on their own thread and never join a
+        batch, so they can't hold up a final transcription.
+        """
         if not audio_data:
             return ""
 
-        # Convert PCM to WAV in memory (faster-whisper needs a file-like)
-        wav_buf = io.BytesIO()
-        with wave.open(wav_buf, "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(sample_rate)
-            wf.writeframes(audio_data)
-        wav_buf.seek(0)
-
-        # Run in thread pool since faster-whisper is synchronous
-        loop = asyncio.get_event_loop()
-        text = await loop.run_in_executor(None, self._transcribe_sync, wav_buf)
-        return text
-
-    def _transcribe_sync(self, wav_buf: io.BytesIO) -> str:
+        # faster-whisper takes 16 kHz float32 samples directly; other rates
+        # go through a WAV container so the library resamples them
+        if sample_rate == 16000:
+            audio = pcm_to_float32(audio_data)
+        else:
+            audio = io.BytesIO(pcm_to_wav(audio_data, sample_rate=sample_rate))
+
+        loop = asyncio.get_running_loop()
+        if partial:
+            return await loop.run_in_executor(
+                self._partial_executor, self._transcribe_sync, audio, 1
+            )
+        busy = self._in_flight > 0 or (self._queue is not None and not self._queue.empty())
+        if (
+            busy
+            and isinstance(audio, np.ndarray)
+            and len(audio) <= MAX_BATCH_SAMPLES
+            and self.language != "auto"
+        ):
+            # Short utterance arriving while others are decoding: hand it to
+            # the batcher so concurrent sessions share one model call
+            if self._batcher is None or self._batcher.done():
+                self._queue = asyncio.Queue()
+                self._batcher = asyncio.create_task(self._batch_loop())
+            future = loop.create_future()
+            await self._queue.put((audio, future))
+            return await future
+
+        # faster-whisper is synchronous; run on the model's worker threads
+        self._in_flight += 1
+        try:
+            return await loop.run_in_executor(self._executor, self._transcribe_sync, audio)
+        finally:
+            self._in_flight -= 1
+
+    async def _batch_loop(self) -> None:
+        """Collect transcriptions that arrive close together into batches."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            self._in_flight += 1  # released by _run_batch
+            deadline = loop.time() + BATCH_WINDOW
+            while len(batch) < MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Run batches as tasks so the next one can start on another worker
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: list[tuple[np.ndarray, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        audios = [audio for audio, _ in batch]
+        try:
+            if len(audios) == 1:
+                texts = [await loop.run_in_executor(
+                    self._executor, self._transcribe_sync, audios[0]
+                )]
+            else:
+                texts = await loop.run_in_executor(
+                    self._executor, self._transcribe_batch_sync, audios
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._in_flight -= 1
+        for (_, future), text in zip(batch, texts):
+            if not future.done():
+                future.set_result(text)
+
+    def _transcribe_sync(self, audio: np.ndarray | io.BytesIO, beam_size: int = 5) -> str:
         model = self._get_model()
         segments, _info = model.transcribe(
-            wav_buf,
+            audio,
             language=self.language if self.language != "auto" else None,
+            beam_size=beam_size,
+            # Interim (greedy) passes re-decode a growing prefix; don't let
+            # one window's guess steer the next
+            condition_on_previous_text=beam_size > 1,
+            compression_ratio_threshold=COMPRESSION_RATIO_THRESHOLD,
+            log_prob_threshold=LOG_PROB_THRESHOLD,
+            no_speech_threshold=NO_SPEECH_THRESHOLD,
             vad_filter=True,
         )
         text = " ".join(seg.text.strip() for seg in segments)
         return text.strip()
+
+    def _transcribe_batch_sync(self, audios: list[np.ndarray]) -> list[str]:
+        """Transcribe several short utterances in one batched model call.
+
+        Falls back to one transcribe() per utterance if the batched path
+        fails (e.g. an incompatible faster-whisper version).
+        """
+        try:
+            return self._generate_batch(audios)
+        except Exception:
+            log.exception("Batched transcription failed, transcribing one by one")
+            return [self._transcribe_sync(audio) for audio in audios]
+
+    def _generate_batch(self, audios: list[np.ndarray]) -> list[str]:
+        """Decode utterances as the clips of one BatchedInferencePipeline call.
+
+        Each utterance is VAD-trimmed exactly as transcribe(vad_filter=True)
+        would and becomes one clip, so no chunk mixes two sessions' audio.
+        The pipeline decodes once at temperature 0; an utterance whose result
+        transcribe() would have retried is decoded again on its own, so the
+        text doesn't depend on whether it happened to share a batch.
+        """
+        from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps
+
+        texts = [""] * len(audios)
+        voiced: list[int] = []
+        speech: list[np.ndarray] = []
+        for i, audio in enumerate(audios):
+            stamps = get_speech_timestamps(audio, VadOptions())
+            if stamps:
+                chunks, _ = collect_chunks(audio, stamps)
+                voiced.append(i)
+                speech.append(np.concatenate(chunks))
+        if not voiced:
+            return texts
+
+        starts: list[int] = []
+        offset = 0
+        for samples in speech:
+            starts.append(offset)
+            offset += len(samples)
+        clips = [
+            {"start": start / 16000, "end": (start + len(samples)) / 16000}
+            for start, samples in zip(starts, speech)
+        ]
+        segments, _info = self._get_pipeline().transcribe(
+            np.concatenate(speech),
+            language=self.language,
+            beam_size=5,
+            compression_ratio_threshold=COMPRESSION_RATIO_THRESHOLD,
+            log_prob_threshold=LOG_PROB_THRESHOLD,
+            no_speech_threshold=NO_SPEECH_THRESHOLD,
+            clip_timestamps=clips,
+            batch_size=len(clips),
+        )
+
+        parts: list[list[str]] = [[] for _ in voiced]
+        retry: set[int] = set()
+        for seg in segments:
+            # Segment times are rounded to the millisecond (16 samples)
+            k = bisect_right(starts, round(seg.start * 16000) + 16) - 1
+            silent = (
+                seg.no_speech_prob > NO_SPEECH_THRESHOLD
+                and seg.avg_logprob < LOG_PROB_THRESHOLD
+            )
+            if silent:
+                continue
+            if (
+                seg.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+                or seg.avg_logprob < LOG_PROB_THRESHOLD
+            ):
+                retry.add(k)
+            parts[k].append(seg.text.strip())
+
+        for k, i in enumerate(voiced):
+            if k in retry:
+                texts[i] = self._transcribe_sync(audios[i])
+            else:
+                texts[i] = " ".join(parts[k]).strip()
+        return texts
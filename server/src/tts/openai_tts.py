@@ -3,17 +3,111 @@
 from __future__ import annotations
 
 import logging
-import re
+from collections import OrderedDict
 from typing import AsyncIterator
 
+import httpx
 import openai
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+except ImportError:  # optional: pip install walkie-talkie-server[http2]
+    h2 = None
+
 from .base import TTSEngine
 
 log = logging.getLogger(__name__)
 
-# Split on sentence boundaries for low-latency TTS
-SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+# Sentence boundaries for low-latency TTS: a period after one of these
+# words doesn't end the sentence, and shorter fragments are merged forward
+# so each TTS request is worth its connection setup.
+ABBREVIATIONS = frozenset({"dr", "mr", "mrs", "ms", "mt", "vs", "etc", "e.g", "i.e"})
+MIN_SENTENCE_CHARS = 10
+
+# Synthesized audio kept per sentence so repeated replies skip the API
+AUDIO_CACHE_SIZE = 128
+AUDIO_CACHE_MAX_CHARS = 300  # longer sentences are not cached
+
+# Connection pool shared by every TTS engine so sentence requests reuse warm
+# TLS connections instead of reconnecting; HTTP/2 multiplexes them when h2 is
+# installed.
+HTTP_KEEPALIVE_CONNECTIONS = 64
+HTTP_KEEPALIVE_EXPIRY = 120.0
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def _shared_http_client() -> httpx.AsyncClient:
+    """Return the process-wide HTTP client used for TTS requests."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = openai.DefaultAsyncHttpxClient(
+            http2=h2 is not None,
+            limits=httpx.Limits(
+                max_keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=HTTP_TIMEOUT,
+        )
+    return _http_client
+
+
+class SentenceBuffer:
+    """Accumulates text and emits complete sentences.
+
+    A boundary is ".", "!" or "?" followed by whitespace, so decimals like
+    3.14 never split. Periods after known abbreviations or single-letter
+    initials are skipped, and sentences shorter than ``min_chars`` are held
+    and joined with the next one. Call ``flush()`` at end of stream.
+    """
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS) -> None:
+        self.min_chars = min_chars
+        self._buf = ""
+        self._scanned = 0  # offset in _buf already checked for boundaries
+
+    def feed(self, text: str) -> list[str]:
+        """Add text and return any sentences it completed."""
+        buf = self._buf + text
+        sentences: list[str] = []
+        start = 0
+        i = self._scanned
+        # The last char can't be judged until we see what follows it
+        while i < len(buf) - 1:
+            if (
+                buf[i] in ".!?"
+                and buf[i + 1].isspace()
+                and not _is_abbreviation(buf, start, i)
+            ):
+                sentence = buf[start:i + 1].strip()
+                if len(sentence) >= self.min_chars:
+                    sentences.append(sentence)
+                    start = i + 1
+            i += 1
+        self._buf = buf[start:]
+        self._scanned = i - start
+        return sentences
+
+    def flush(self) -> str | None:
+        """Return whatever text is left over and reset the buffer."""
+        rest = self._buf.strip()
+        self._buf = ""
+        self._scanned = 0
+        return rest or None
+
+
+def _is_abbreviation(buf: str, start: int, end: int) -> bool:
+    """Check whether the period at ``end`` closes an abbreviation."""
+    if buf[end] != ".":
+        return False
+    words = buf[start:end].split()
+    if not words:
+        return False
+    word = words[-1].lstrip("(\"'")
+    if len(word) == 1 and word.isupper():
+        return True  # an initial, as in "J. Smith"
+    return word.lower() in ABBREVIATIONS
 
 
 class OpenAITTS(TTSEngine):
@@ -27,11 +121,15 @@ class OpenAITTS(TTSEngine):
         speed: float = 1.0,
         instructions: str = "",
     ) -> None:
-        self.client = openai.AsyncOpenAI(api_key=api_key)
+        self.client = openai.AsyncOpenAI(
+            api_key=api_key, http_client=_shared_http_client()
+        )
         self.model = model
         self.voice = voice
         self.speed = speed
         self.instructions = instructions
+        # sentence -> MP3 chunks, in LRU order
+        self._audio_cache: OrderedDict[str, list[bytes]] = OrderedDict()
 
     async def synthesize(self, text: str) -> AsyncIterator[bytes]:
         """Stream TTS audio for the given text.
@@ -40,18 +138,29 @@ class OpenAITTS(TTSEngine):
         Yields MP3 audio chunks.
         """
         # Split into sentences for faster first-byte
-        sentences = SENTENCE_SPLIT.split(text.strip())
-        sentences = [s.strip() for s in sentences if s.strip()]
+        splitter = SentenceBuffer()
+        sentences = splitter.feed(text)
+        rest = splitter.flush()
+        if rest:
+            sentences.append(rest)
 
         if not sentences:
             return
 
         for sentence in sentences:
+            cached = self._audio_cache.get(sentence)
+            if cached is not None:
+                self._audio_cache.move_to_end(sentence)
+                for chunk in cached:
+                    yield chunk
+                continue
+
             async for chunk in self._synthesize_chunk(sentence):
                 yield chunk
 
     async def _synthesize_chunk(self, text: str) -> AsyncIterator[bytes]:
-        """Stream TTS for a single text chunk."""
+        """Stream TTS for a single text chunk, caching complete short results."""
+        chunks: list[bytes] = []
         try:
             kwargs = dict(
                 model=self.model,
@@ -66,6 +175,11 @@ class OpenAITTS(TTSEngine):
                 **kwargs,
             ) as response:
                 async for chunk in response.iter_bytes(chunk_size=4096):
+                    chunks.append(chunk)
                     yield chunk
+            if chunks and len(text) <= AUDIO_CACHE_MAX_CHARS:
+                self._audio_cache[text] = chunks
+                if len(self._audio_cache) > AUDIO_CACHE_SIZE:
+                    self._audio_cache.popitem(last=False)
         except Exception:
             log.exception("TTS synthesis failed for chunk")
@@ -2,33 +2,36 @@
 
 from __future__ import annotations
 
-import io
 import struct
-import wave
 
 import numpy as np
 
 
 def pcm_to_wav(pcm_data: bytes, sample_rate: int = 16000, channels: int = 1) -> bytes:
     """Convert raw PCM s16le bytes to WAV format."""
-    buf = io.BytesIO()
-    with wave.open(buf, "wb") as wf:
-        wf.setnchannels(channels)
-        wf.setsampwidth(2)  # 16-bit
-        wf.setframerate(sample_rate)
-        wf.writeframes(pcm_data)
-    return buf.getvalue()
+    # Canonical 44-byte RIFF/WAVE header for 16-bit PCM
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(pcm_data), b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate,
+        sample_rate * channels * 2, channels * 2, 16,
+        b"data", len(pcm_data),
+    )
+    return header + pcm_data
 
 
 def pcm_to_float32(pcm_data: bytes) -> np.ndarray:
     """Convert PCM s16le bytes to float32 numpy array in [-1, 1]."""
-    samples = np.frombuffer(pcm_data, dtype=np.int16)
-    return samples.astype(np.float32) / 32768.0
+    # frombuffer is a view; astype is the only copy, then scale in place
+    samples = np.frombuffer(pcm_data, dtype=np.int16).astype(np.float32)
+    samples *= 1.0 / 32768.0
+    return samples
 
 
 def compute_rms(pcm_data: bytes) -> float:
     """Compute RMS energy of PCM s16le audio."""
     if len(pcm_data) < 2:
         return 0.0
-    samples = np.frombuffer(pcm_data, dtype=np.int16)
-    return float(np.sqrt(np.mean(samples.astype(np.float64) ** 2)))
+    # float32 dot: one pass, no squared temporary. (int32 would overflow.)
+    samples = np.frombuffer(pcm_data, dtype=np.int16).astype(np.float32)
+    return float(np.sqrt(samples.dot(samples) / samples.size))
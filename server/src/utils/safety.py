@@ -3,53 +3,105 @@
 from __future__ import annotations
 
 import os
+import re
 from pathlib import Path
+from typing import Any
+
+try:
+    import ahocorasick
+except ImportError:  # optional: pip install walkie-talkie-server[safety]
+    ahocorasick = None
 
 
 class PathSandbox:
     """Ensures all file operations stay within workspace root."""
 
-    def __init__(self, workspace_root: str) -> None:
+    def __init__(self, workspace_root: str | Path) -> None:
         self.root = Path(workspace_root).resolve()
         self.root.mkdir(parents=True, exist_ok=True)
+        # String forms for prefix checks, computed once
+        self._root_str = str(self.root)
+        self._root_prefix = os.path.join(self._root_str, "")
+
+    def _contains(self, path: str) -> bool:
+        return path == self._root_str or path.startswith(self._root_prefix)
 
     def resolve(self, path: str) -> Path:
         """Resolve a path relative to workspace root, ensuring it stays inside.
 
+        The ".." check is plain string math; symlinks are then followed with
+        a single realpath call and the result checked again.
         Raises ValueError if the resolved path escapes the sandbox.
         """
-        # Handle absolute paths by making them relative
-        p = Path(path)
-        if p.is_absolute():
-            try:
-                p = p.relative_to(self.root)
-            except ValueError:
-                # Absolute path outside workspace - treat as relative
-                p = Path(str(path).lstrip("/"))
-
-        resolved = (self.root / p).resolve()
-
-        # Ensure we're still within the sandbox
-        try:
-            resolved.relative_to(self.root)
-        except ValueError:
-            raise ValueError(
-                f"Path escapes sandbox: {path!r} resolves to {resolved}"
+        path = os.fspath(path)
+        candidate = os.path.normpath(os.path.join(self._root_str, path))
+        if os.path.isabs(path) and not self._contains(candidate):
+            # Absolute path outside workspace - treat as relative
+            candidate = os.path.normpath(
+                os.path.join(self._root_str, path.lstrip("/"))
             )
 
-        return resolved
+        if self._contains(candidate):
+            resolved = os.path.realpath(candidate)
+            if self._contains(resolved):
+                return Path(resolved)
+        else:
+            resolved = candidate
+
+        raise ValueError(
+            f"Path escapes sandbox: {path!r} resolves to {resolved}"
+        )
 
     def resolve_str(self, path: str) -> str:
         return str(self.resolve(path))
 
 
-def check_command_safety(command: str, blocked_patterns: list[str]) -> str | None:
+def compile_blocked_patterns(blocked_patterns: list[str]) -> Any:
+    """Build a matcher for blocked command substrings, matched case-insensitively.
+
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, so a scan
+    is linear in the command length however many patterns there are.
+    Otherwise falls back to one regex alternation with a named group per
+    pattern so a match maps back to it. Returns None if there are no patterns.
+    """
+    if not blocked_patterns:
+        return None
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for pattern in blocked_patterns:
+            # Keep the first spelling if two patterns differ only in case
+            key = pattern.lower()
+            if not automaton.exists(key):
+                automaton.add_word(key, pattern)
+        automaton.make_automaton()
+        return automaton
+    return re.compile(
+        "|".join(f"(?P<p{i}>{re.escape(p)})" for i, p in enumerate(blocked_patterns)),
+        re.IGNORECASE,
+    )
+
+
+def check_command_safety(
+    command: str,
+    blocked_patterns: list[str],
+    compiled: Any = None,
+) -> str | None:
     """Check if a command matches any blocked pattern.
 
+    Pass compiled (from compile_blocked_patterns) to avoid rebuilding the
+    matcher on every call.
+
     Returns the matched pattern if blocked, None if safe.
     """
-    cmd_lower = command.lower().strip()
-    for pattern in blocked_patterns:
-        if pattern.lower() in cmd_lower:
-            return pattern
+    if compiled is None:
+        compiled = compile_blocked_patterns(blocked_patterns)
+        if compiled is None:
+            return None
+    if isinstance(compiled, re.Pattern):
+        m = compiled.search(command)
+        if m is None:
+            return None
+        return blocked_patterns[int(m.lastgroup[1:])]
+    for _end, pattern in compiled.iter(command.lower()):
+        return pattern
     return None
@@ -3,26 +3,22 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import re
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
 
 from ..config import WorkspaceConfig
 from ..claude.tool_executor import ToolExecutor
 from ..utils.safety import PathSandbox
 from .protocol import (
-    AudioEnd,
     AudioPrefix,
-    AudioStart,
     Error,
     ImageMessage,
-    Interrupt,
-    Ping,
     Pong,
-    ResponseDelta,
     ResponseEnd,
     SelectWorkspace,
     TextMessage,
@@ -33,7 +29,6 @@ from .protocol import (
     TTSStart,
     WorkspaceList,
     WorkspaceSelected,
-    parse_incoming,
 )
 from .session import Session
 
@@ -44,6 +39,23 @@ if TYPE_CHECKING:
 
 log = logging.getLogger(__name__)
 
+SPEAK_RE = re.compile(r"<speak>(.*?)</speak>", re.DOTALL)
+
+# Display deltas are coalesced into one frame until this many chars are
+# pending or this many seconds have passed since the last frame.
+DELTA_FLUSH_CHARS = 64
+DELTA_FLUSH_INTERVAL = 0.02
+
+# Trailing words of an interim transcript are held back: the decoder still
+# revises them as more audio arrives
+PARTIAL_UNSTABLE_WORDS = 2
+
+# Speak blocks waiting for synthesis; beyond this TTS can't catch up and
+# further blocks are dropped rather than paid for
+TTS_QUEUE_SIZE = 8
+
+_TTS_PREFIX = bytes([AudioPrefix.TTS])
+
 
 class ConnectionHandler:
     """Manages a single WebSocket connection."""
@@ -65,14 +77,32 @@ class ConnectionHandler:
         self.tts = tts_engine
         self.workspaces = {w.name: w for w in (workspaces or [])}
         self.safety_config = safety_config or {}
+        # Interim transcription of the utterance being recorded
+        self._partial_task: asyncio.Task | None = None
+        self._partial_mark = 0  # audio_write when the last partial started
+        self._partial_sent = False
+        # Speak text queued for the current response's TTS consumer
+        self._tts_queue: asyncio.Queue[str | None] | None = None
+        # User turns run off the receive loop so an interrupt can get through
+        self._turn_tasks: set[asyncio.Task] = set()
 
     async def send_json(self, msg) -> None:
         """Send a Pydantic model as JSON text frame."""
         await self.ws.send_text(msg.model_dump_json())
 
+    async def send_delta(self, text: str) -> None:
+        """Send a ResponseDelta frame without building a Pydantic model.
+
+        This runs per streamed token, so the dict is serialized directly.
+        JSON must stay in text frames: the phone treats binary frames as audio.
+        """
+        await self.ws.send_text(
+            orjson.dumps({"type": "response_delta", "text": text}).decode()
+        )
+
     async def send_audio(self, data: bytes) -> None:
         """Send TTS audio as binary frame with prefix."""
-        await self.ws.send_bytes(bytes([AudioPrefix.TTS]) + data)
+        await self.ws.send_bytes(_TTS_PREFIX + data)
 
     async def handle(self) -> None:
         """Main message loop."""
@@ -102,44 +132,70 @@ class ConnectionHandler:
         except Exception:
             log.exception("Session %s error", sid)
         finally:
-            self.session.cancel_response()
+            for task in self._turn_tasks:
+                task.cancel()
+            await self.session.cancel_response()
+            self._cancel_partial()
             log.info("Session %s cleaned up", sid)
 
     async def _handle_text(self, text: str) -> None:
-        """Route a JSON text frame."""
+        """Route a JSON text frame.
+
+        Dispatches on the "type" field. Only messages that carry fields are
+        validated through their Pydantic model; ping, interrupt and the audio
+        markers go straight to their handler.
+        """
         try:
-            data = json.loads(text)
-            msg = parse_incoming(data)
-        except (json.JSONDecodeError, ValueError) as e:
+            data = orjson.loads(text)
+            msg_type = data.get("type") if isinstance(data, dict) else None
+            route = self._TEXT_ROUTES.get(msg_type)  # type: ignore[arg-type]
+            if route is None:
+                raise ValueError(f"Unknown message type: {msg_type}")
+            model, handler = route
+            msg = model.model_validate(data) if model is not None else None
+        except ValueError as e:
             log.warning("Parse error: %s (raw: %s)", e, text[:200])
             await self.send_json(Error(message=str(e), code="parse_error"))
             return
 
-        log.info("Session %s received: %s", self.session.session_id, type(msg).__name__)
-
-        match msg:
-            case Ping():
-                await self.send_json(Pong())
-
-            case SelectWorkspace(name=name):
-                await self._handle_select_workspace(name)
+        log.info("Session %s received: %s", self.session.session_id, msg_type)
+        await handler(self, msg)
 
-            case TextMessage(text=user_text):
-                await self._handle_user_input(user_text)
+    async def _on_ping(self, _msg: None) -> None:
+        await self.send_json(Pong())
 
-            case ImageMessage():
-                await self._handle_image(msg)
+    async def _on_select_workspace(self, msg: SelectWorkspace) -> None:
+        await self._handle_select_workspace(msg.name)
 
-            case AudioStart():
-                self.session.is_recording = True
-                self.session.clear_audio_buffer()
+    async def _on_text_message(self, msg: TextMessage) -> None:
+        self._start_turn(msg.text)
 
-            case AudioEnd():
-                self.session.is_recording = False
-                await self._handle_audio_end()
+    async def _on_image_message(self, msg: ImageMessage) -> None:
+        await self._handle_image(msg)
 
-            case Interrupt():
-                await self._handle_interrupt()
+    async def _on_audio_start(self, _msg: None) -> None:
+        self.session.is_recording = True
+        self.session.clear_audio_buffer()
+        self._cancel_partial()
+        self._partial_sent = False
+
+    async def _on_audio_end(self, _msg: None) -> None:
+        self.session.is_recording = False
+        await self._handle_audio_end()
+
+    async def _on_interrupt(self, _msg: None) -> None:
+        await self._handle_interrupt()
+
+    # type -> (model to validate against, or None to skip validation; handler)
+    _TEXT_ROUTES: dict[str, tuple[type[BaseModel] | None, Callable]] = {
+        "ping": (None, _on_ping),
+        "select_workspace": (SelectWorkspace, _on_select_workspace),
+        "text_message": (TextMessage, _on_text_message),
+        "image_message": (ImageMessage, _on_image_message),
+        "audio_start": (None, _on_audio_start),
+        "audio_end": (None, _on_audio_end),
+        "interrupt": (None, _on_interrupt),
+    }
 
     async def _handle_binary(self, data: bytes) -> None:
         """Handle binary audio frame."""
@@ -149,7 +205,63 @@ class ConnectionHandler:
         payload = data[1:]
 
         if prefix == AudioPrefix.MIC and self.session.is_recording:
-            self.session.audio_buffer.extend(payload)
+            self.session.append_audio(payload)
+            self._maybe_start_partial()
+
+    def _maybe_start_partial(self) -> None:
+        """Start an interim transcription once enough new audio has arrived.
+
+        At most one runs at a time; if the last one is still decoding, the
+        next starts on a later frame with the longer buffer. None start while
+        final transcriptions are queued, since they compete for the model.
+        """
+        interval = self.session.settings.stt.partial_interval
+        if not self.stt or interval <= 0 or self.stt.backlog > 0:
+            return
+        if self._partial_task is not None and not self._partial_task.done():
+            return
+        step = int(interval * self.session.settings.audio.sample_rate) * 2
+        if self.session.audio_write - self._partial_mark < step:
+            return
+        self._partial_mark = self.session.audio_write
+        self._partial_task = asyncio.create_task(
+            self._partial_transcribe(self.session.audio_bytes())
+        )
+
+    def _cancel_partial(self) -> None:
+        if self._partial_task is not None:
+            self._partial_task.cancel()
+            self._partial_task = None
+        self._partial_mark = 0
+
+    async def _partial_transcribe(self, audio_data: bytes) -> None:
+        """Send an interim transcript of the utterance recorded so far."""
+        try:
+            text = await self.stt.transcribe(
+                audio_data,
+                sample_rate=self.session.settings.audio.sample_rate,
+                partial=True,
+            )
+        except Exception:
+            log.debug("Partial transcription failed", exc_info=True)
+            return
+        words = text.split()
+        if len(words) <= PARTIAL_UNSTABLE_WORDS or not self.session.is_recording:
+            return
+        self._partial_sent = True
+        await self.send_json(Transcription(
+            text=" ".join(words[:-PARTIAL_UNSTABLE_WORDS]), is_final=False
+        ))
+
+    def _start_turn(self, text: str, images: list[dict] | None = None) -> None:
+        """Run a user turn in the background.
+
+        The receive loop must keep reading while Claude responds, or an
+        interrupt frame would only be seen once the response had finished.
+        """
+        task = asyncio.create_task(self._handle_user_input(text, images))
+        self._turn_tasks.add(task)
+        task.add_done_callback(self._turn_tasks.discard)
 
     async def _handle_user_input(
         self, text: str, images: list[dict] | None = None
@@ -160,89 +272,169 @@ class ConnectionHandler:
             content.extend(images)
         content.append({"type": "text", "text": text})
 
-        self.session.add_user_message(content)
-        self.session.interrupted = False
-        self.session.is_responding = True
-
-        # Run Claude response in a task so it can be cancelled
-        self.session.response_task = asyncio.create_task(
-            self._run_claude_response()
-        )
-        try:
-            await self.session.response_task
-        except asyncio.CancelledError:
-            log.info("Response cancelled for session %s", self.session.session_id)
-        except Exception as e:
-            log.exception("Response error for session %s", self.session.session_id)
-            await self.send_json(Error(message=str(e), code="claude_error"))
-        finally:
-            self.session.is_responding = False
-            self.session.response_task = None
+        # A new turn supersedes one still streaming; wait for it to unwind
+        # before touching history
+        await self.session.cancel_response()
+        async with self.session.turn_lock:
+            # Messages still being summarized are in neither the history nor
+            # the summary; this turn's request has to wait for them
+            summary_task = self.session.summary_task
+            if summary_task is not None and not summary_task.done():
+                await asyncio.wait([summary_task])
+            self.session.add_user_parts(content)
+            self.session.interrupted = False
+            self.session.is_responding = True
+
+            # Run Claude response in a task so it can be cancelled
+            self.session.response_task = asyncio.create_task(
+                self._run_claude_response()
+            )
+            try:
+                await self.session.response_task
+            except asyncio.CancelledError:
+                log.info("Response cancelled for session %s", self.session.session_id)
+            except Exception as e:
+                log.exception("Response error for session %s", self.session.session_id)
+                await self.send_json(Error(message=str(e), code="claude_error"))
+            finally:
+                self.session.is_responding = False
+                self.session.response_task = None
+
+            # Off the turn path: the client can send its next message while
+            # the summary model runs
+            self.session.summary_task = asyncio.create_task(
+                self.claude.summarize_evicted(self.session)
+            )
 
     async def _run_claude_response(self) -> None:
         """Stream Claude response back to client, handling tool use."""
         # Separate buffer for detecting <speak> tags — consumed as tags are found,
         # so it stays small and doesn't re-scan old text.
         tts_buffer = ""
-        tts_queue: asyncio.Queue[str | None] = asyncio.Queue()
+        tts_queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=TTS_QUEUE_SIZE)
         tts_task: asyncio.Task | None = None
 
         if self.tts:
+            self._tts_queue = tts_queue
             tts_task = asyncio.create_task(self._tts_consumer(tts_queue))
 
-        async for event in self.claude.stream_response(
+        # Display text waiting to go out as a single response_delta frame
+        loop = asyncio.get_running_loop()
+        pending_delta = ""
+        last_flush = loop.time()
+        flush_timer: asyncio.TimerHandle | None = None
+        flush_tasks: set[asyncio.Task] = set()  # flushes started by the timer
+        # Timed flushes run beside the stream loop; text is taken and sent
+        # under one lock so frames go out in the order it arrived
+        send_lock = asyncio.Lock()
+
+        async def flush_delta() -> None:
+            nonlocal pending_delta, last_flush, flush_timer
+            if flush_timer is not None:
+                flush_timer.cancel()
+                flush_timer = None
+            last_flush = loop.time()
+            async with send_lock:
+                if pending_delta:
+                    text, pending_delta = pending_delta, ""
+                    await self.send_delta(text)
+
+        def on_flush_timer() -> None:
+            # The stream paused with text still pending — send it out
+            nonlocal flush_timer
+            flush_timer = None
+            if pending_delta:
+                task = asyncio.create_task(flush_delta())
+                flush_tasks.add(task)
+                task.add_done_callback(flush_tasks.discard)
+
+        stream = self.claude.stream_response(
             self.session, executor=self.session.tool_executor
-        ):
-            if self.session.interrupted:
-                break
+        )
+        try:
+            async for event in stream:
+                if self.session.interrupted:
+                    break
 
-            if event["type"] == "text_delta":
-                delta = event["text"]
-
-                # Strip <speak> tags for display, keep content
-                display_text = delta.replace("<speak>", "").replace("</speak>", "")
-                if display_text:
-                    await self.send_json(ResponseDelta(text=display_text))
-
-                # Accumulate into TTS buffer and extract completed <speak> blocks
-                if self.tts:
-                    tts_buffer += delta
-                    while True:
-                        match = re.search(r"<speak>(.*?)</speak>", tts_buffer, re.DOTALL)
-                        if not match:
-                            break
-                        speak_text = match.group(1).strip()
-                        if speak_text:
-                            await tts_queue.put(speak_text)
-                        # Consume everything up to and including the matched tag
-                        tts_buffer = tts_buffer[match.end():]
-
-            elif event["type"] == "text_done":
-                pass
-
-            elif event["type"] == "tool_use":
-                await self.send_json(ToolUse(
-                    tool_name=event["tool_name"],
-                    tool_id=event["tool_id"],
-                    input=event["input"],
-                ))
-
-            elif event["type"] == "tool_result":
-                await self.send_json(ToolResult(
-                    tool_id=event["tool_id"],
-                    tool_name=event["tool_name"],
-                    success=event["success"],
-                    output=event["output"][:2000],
-                ))
-
-            elif event["type"] == "response_complete":
-                pass
-
-        await self.send_json(ResponseEnd())
-
-        if tts_task:
-            await tts_queue.put(None)
-            await tts_task
+                if event["type"] == "text_delta":
+                    delta = event["text"]
+
+                    # Strip <speak> tags for display, keep content
+                    display_text = delta.replace("<speak>", "").replace("</speak>", "")
+                    if display_text:
+                        pending_delta += display_text
+                        if (
+                            len(pending_delta) >= DELTA_FLUSH_CHARS
+                            or loop.time() - last_flush > DELTA_FLUSH_INTERVAL
+                        ):
+                            await flush_delta()
+                        elif flush_timer is None:
+                            flush_timer = loop.call_later(
+                                DELTA_FLUSH_INTERVAL, on_flush_timer
+                            )
+
+                    # Accumulate into TTS buffer and extract completed <speak> blocks
+                    if self.tts:
+                        tts_buffer += delta
+                        # Only run the regex once a closing tag has arrived
+                        while "</speak>" in tts_buffer:
+                            match = SPEAK_RE.search(tts_buffer)
+                            if not match:
+                                break
+                            speak_text = match.group(1).strip()
+                            if speak_text:
+                                try:
+                                    tts_queue.put_nowait(speak_text)
+                                except asyncio.QueueFull:
+                                    log.warning("TTS backlogged, dropping speak block")
+                            # Consume everything up to and including the matched tag
+                            tts_buffer = tts_buffer[match.end():]
+                        if "<speak>" not in tts_buffer:
+                            # No open tag: keep just enough for a tag split across deltas
+                            tts_buffer = tts_buffer[-(len("<speak>") - 1):]
+
+                elif event["type"] == "text_done":
+                    pass
+
+                elif event["type"] == "tool_use":
+                    await flush_delta()
+                    await self.send_json(ToolUse(
+                        tool_name=event["tool_name"],
+                        tool_id=event["tool_id"],
+                        input=event["input"],
+                    ))
+
+                elif event["type"] == "tool_result":
+                    await self.send_json(ToolResult(
+                        tool_id=event["tool_id"],
+                        tool_name=event["tool_name"],
+                        success=event["success"],
+                        output=event["output"][:2000],
+                    ))
+
+                elif event["type"] == "response_complete":
+                    pass
+
+            await flush_delta()
+            await self.send_json(ResponseEnd())
+
+            if tts_task:
+                await tts_queue.put(None)
+                await tts_task
+        finally:
+            # Close the stream now rather than when it's garbage collected,
+            # so the history it writes on the way out lands in this turn
+            await stream.aclose()
+            # Don't leave a flush scheduled or a TTS consumer waiting past a
+            # cancelled response
+            if flush_timer is not None:
+                flush_timer.cancel()
+            for task in flush_tasks:
+                task.cancel()
+            if tts_task and not tts_task.done():
+                tts_task.cancel()
+            if self._tts_queue is tts_queue:
+                self._tts_queue = None
 
     async def _tts_consumer(self, queue: asyncio.Queue[str | None]) -> None:
         """Consume speak text from the queue and stream TTS audio."""
@@ -283,10 +475,13 @@ class ConnectionHandler:
             sandbox=sandbox,
             blocked_commands=self.safety_config.get("blocked_commands", []),
             command_timeout=self.safety_config.get("command_timeout", 30),
+            memoize=True,
         )
+        # Stop a response still streaming before the history it writes to
+        # is cleared
+        await self.session.cancel_response()
         self.session.workspace_name = name
-        self.session.conversation.clear()
-        self.session.cancel_response()
+        self.session.clear_conversation()
 
         log.info("Session %s switched to workspace %s (%s)",
                  self.session.session_id, name, ws_config.path)
@@ -294,8 +489,11 @@ class ConnectionHandler:
 
     async def _handle_audio_end(self) -> None:
         """Transcribe buffered audio and send to Claude."""
-        audio_data = bytes(self.session.audio_buffer)
+        audio_data = self.session.audio_bytes()
         self.session.clear_audio_buffer()
+        self._cancel_partial()
+        # The phone shows interim text as a placeholder until a final arrives
+        partial_sent, self._partial_sent = self._partial_sent, False
 
         if not audio_data or not self.stt:
             if not self.stt:
@@ -311,14 +509,18 @@ class ConnectionHandler:
             )
         except Exception:
             log.exception("STT error")
+            if partial_sent:
+                await self.send_json(Transcription(text=""))
             await self.send_json(Error(message="Transcription failed", code="stt_error"))
             return
 
         if not text or not text.strip():
+            if partial_sent:
+                await self.send_json(Transcription(text=""))
             return
 
         await self.send_json(Transcription(text=text))
-        await self._handle_user_input(text)
+        self._start_turn(text)
 
     async def _handle_image(self, msg: ImageMessage) -> None:
         """Handle image message with optional text."""
@@ -331,9 +533,14 @@ class ConnectionHandler:
             },
         }]
         text = msg.text or "What do you see in this image?"
-        await self._handle_user_input(text, images=images)
+        self._start_turn(text, images=images)
 
     async def _handle_interrupt(self) -> None:
         """Interrupt current response and TTS playback."""
-        self.session.cancel_response()
+        # Drop speak text that hasn't been synthesized yet, before the
+        # consumer can pick up the next block while the response unwinds
+        queue = self._tts_queue
+        while queue is not None and not queue.empty():
+            queue.get_nowait()
+        await self.session.cancel_response()
         log.info("Session %s interrupted", self.session.session_id)
@@ -129,21 +129,3 @@ OutgoingMessage = (
     Transcription | ResponseDelta | ResponseEnd | ToolUse | ToolResult
     | TTSStart | TTSEnd | Error | Pong | WorkspaceList | WorkspaceSelected
 )
-
-INCOMING_TYPES: dict[str, type[BaseModel]] = {
-    "audio_start": AudioStart,
-    "audio_end": AudioEnd,
-    "text_message": TextMessage,
-    "image_message": ImageMessage,
-    "interrupt": Interrupt,
-    "ping": Ping,
-    "select_workspace": SelectWorkspace,
-}
-
-
-def parse_incoming(data: dict[str, Any]) -> IncomingMessage:
-    msg_type = data.get("type")
-    cls = INCOMING_TYPES.get(msg_type)  # type: ignore[arg-type]
-    if cls is None:
-        raise ValueError(f"Unknown message type: {msg_type}")
-    return cls(**data)
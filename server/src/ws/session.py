@@ -4,35 +4,100 @@ from __future__ import annotations
 
 import asyncio
 import logging
-import time
-import uuid
+import secrets
+from collections import deque
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING
+from time import monotonic as _now
+from typing import TYPE_CHECKING, NamedTuple
 
-from ..config import Settings
+from ..config import Settings, get_settings
 
 if TYPE_CHECKING:
     from ..claude.tool_executor import ToolExecutor
 
 log = logging.getLogger(__name__)
 
+# History is trimmed (oldest pair first) above this estimated token count
+MAX_HISTORY_TOKENS = 100_000
 
-@dataclass
+# Mic buffers kept for reuse by later sessions instead of reallocating
+AUDIO_POOL_SIZE = 16
+
+# How long cancel_response waits for a cancelled response to unwind (seconds)
+RESPONSE_CANCEL_TIMEOUT = 2.0
+
+
+class Msg(NamedTuple):
+    """One conversation history entry."""
+
+    role: str
+    content: list[dict]
+
+    def as_dict(self) -> dict:
+        """The message in the shape the Anthropic API takes."""
+        return {"role": self.role, "content": self.content}
+
+
+def _content_chars(content: list[dict] | str) -> int:
+    """Character count of a message's content, as used for token estimates."""
+    if isinstance(content, str):
+        return len(content)
+    total = 0
+    for block in content:
+        if isinstance(block, dict):
+            total += len(block.get("text", ""))
+            total += len(block.get("content", ""))
+    return total
+
+
+class _BufferPool:
+    """Free list of audio buffers handed from closed sessions to new ones."""
+
+    def __init__(self, max_free: int) -> None:
+        self._free: list[bytearray] = []
+        self._max_free = max_free
+
+    def get(self, size: int) -> bytearray:
+        """Return a buffer of at least size bytes (contents are stale)."""
+        while self._free:
+            buf = self._free.pop()
+            if len(buf) >= size:
+                return buf
+        return bytearray(size)
+
+    def put(self, buf: bytearray, size: int) -> None:
+        # Buffers that grew for one unusually long recording aren't kept
+        if len(self._free) < self._max_free and size <= len(buf) <= size * 2:
+            self._free.append(buf)
+
+
+_AUDIO_POOL = _BufferPool(AUDIO_POOL_SIZE)
+
+
+@dataclass(slots=True)
 class Session:
     """Holds all state for a single WebSocket connection."""
 
-    session_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
-    settings: Settings = field(default_factory=Settings)
+    session_id: str = field(default_factory=lambda: secrets.token_hex(6))
+    settings: Settings = field(default_factory=get_settings)
 
     # Active workspace
     workspace_name: str | None = None
     tool_executor: ToolExecutor | None = field(default=None, repr=False)
 
-    # Claude conversation history: list of {"role": ..., "content": ...}
-    conversation: list[dict] = field(default_factory=list)
-
-    # Audio buffering
-    audio_buffer: bytearray = field(default_factory=bytearray)
+    # Claude conversation history, capped at max_conversation_turns * 2
+    # messages (oldest evicted on append); dicts are built per API request
+    conversation: deque[Msg] = field(default_factory=deque)
+    # Running total of _content_chars over conversation, for estimate_tokens
+    _char_count: int = field(default=0, init=False, repr=False)
+    # Digest of turns that fell out of conversation, sent with the system
+    # prompt; evicted holds dropped messages not yet folded into it
+    summary: str = ""
+    evicted: list[Msg] = field(default_factory=list, repr=False)
+
+    # Audio buffering: preallocated buffer, valid bytes are [:audio_write]
+    audio_buffer: bytearray = field(default_factory=bytearray, repr=False)
+    audio_write: int = 0
     is_recording: bool = False
 
     # TTS/response state
@@ -41,74 +106,127 @@ class Session:
 
     # Cancellation for the current Claude response task
     response_task: asyncio.Task | None = field(default=None, repr=False)
-
-    # Timing
-    created_at: float = field(default_factory=time.time)
-    last_activity: float = field(default_factory=time.time)
+    # Background fold of evicted messages into summary, started after a turn
+    summary_task: asyncio.Task | None = field(default=None, repr=False)
+    # Held for a whole user turn (history append through response), so a new
+    # turn can't interleave its messages with one still being written
+    turn_lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    # Timing (monotonic clock: only ever compared against "now")
+    created_at: float = field(default_factory=_now)
+    last_activity: float = field(default_factory=_now)
+    # Set per inbound frame; the reaper folds it into last_activity on its
+    # sweep, so frames don't each read the clock
+    touched: bool = False
+
+    def __post_init__(self) -> None:
+        max_messages = self.settings.claude.max_conversation_turns * 2
+        self.conversation = deque(self.conversation, maxlen=max_messages)
+        self._char_count = sum(_content_chars(msg.content) for msg in self.conversation)
+        if len(self.audio_buffer) < self._audio_capacity():
+            self.audio_buffer = _AUDIO_POOL.get(self._audio_capacity())
+
+    def _audio_capacity(self) -> int:
+        audio = self.settings.audio
+        return audio.max_recording_seconds * audio.sample_rate * audio.channels * 2
 
     def touch(self) -> None:
-        self.last_activity = time.time()
+        self.touched = True
 
-    def add_user_message(self, content: list[dict] | str) -> None:
-        """Append a user message to conversation history."""
-        if isinstance(content, str):
-            content = [{"type": "text", "text": content}]
-        self.conversation.append({"role": "user", "content": content})
-        self._trim_history()
+    def add_user_parts(self, parts: list[dict]) -> None:
+        """Append a user message of content blocks (text, images, tool results)."""
+        self._append(Msg("user", parts))
 
     def add_assistant_message(self, content: list[dict]) -> None:
         """Append an assistant message to conversation history."""
-        self.conversation.append({"role": "assistant", "content": content})
+        self._append(Msg("assistant", content))
+
+    def clear_conversation(self) -> None:
+        if self.summary_task is not None:
+            self.summary_task.cancel()  # it would write back a stale summary
+            self.summary_task = None
+        self.conversation.clear()
+        self._char_count = 0
+        self.summary = ""
+        self.evicted.clear()
+
+    def _append(self, message: Msg) -> None:
+        """Append a message, keeping the char count in step with evictions."""
+        if len(self.conversation) == self.conversation.maxlen:
+            self._evict(self.conversation[0])
+        self.conversation.append(message)
+        self._char_count += _content_chars(message.content)
         self._trim_history()
 
-    def _trim_history(self) -> None:
-        """Keep conversation within configured turn limit."""
-        max_turns = self.settings.claude.max_conversation_turns
-        # Each turn is 2 messages (user + assistant), keep some extra
-        max_messages = max_turns * 2
-        if len(self.conversation) > max_messages:
-            # Remove oldest pairs, keeping at least the last max_messages
-            excess = len(self.conversation) - max_messages
-            self.conversation = self.conversation[excess:]
+    def append_audio(self, payload: bytes) -> None:
+        """Copy a mic frame into the audio buffer, growing it only if full."""
+        end = self.audio_write + len(payload)
+        if end > len(self.audio_buffer):
+            grow = max(end - len(self.audio_buffer), len(self.audio_buffer) // 2)
+            self.audio_buffer.extend(bytes(grow))
+        self.audio_buffer[self.audio_write:end] = payload
+        self.audio_write = end
+
+    def audio_bytes(self) -> bytes:
+        """Return the buffered audio recorded so far."""
+        return bytes(memoryview(self.audio_buffer)[:self.audio_write])
 
     def clear_audio_buffer(self) -> None:
-        self.audio_buffer.clear()
+        """Forget buffered audio; the allocation is kept for the next utterance."""
+        self.audio_write = 0
 
-    def cancel_response(self) -> None:
-        """Cancel any in-flight Claude response."""
+    def release_audio_buffer(self) -> None:
+        """Hand the audio buffer to the pool for the next session.
+
+        The session keeps working afterwards, starting from an empty buffer.
+        """
+        _AUDIO_POOL.put(self.audio_buffer, self._audio_capacity())
+        self.audio_buffer = bytearray()
+        self.audio_write = 0
+
+    async def cancel_response(self) -> None:
+        """Cancel any in-flight Claude response and wait for it to unwind.
+
+        The wait is shielded so the task's cleanup (closing the API stream,
+        cancelling TTS) still finishes if the caller is cancelled meanwhile.
+        """
         self.interrupted = True
-        if self.response_task and not self.response_task.done():
-            self.response_task.cancel()
+        task = self.response_task
+        if task is None or task.done() or task is asyncio.current_task():
+            return
+        task.cancel()
+        try:
+            await asyncio.shield(asyncio.wait_for(task, RESPONSE_CANCEL_TIMEOUT))
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # Only swallow the response's own cancellation, not ours
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+            if not task.done():
+                log.warning("Session %s response did not stop within %.1fs",
+                            self.session_id, RESPONSE_CANCEL_TIMEOUT)
+        except Exception:
+            log.exception("Session %s response failed while cancelling", self.session_id)
 
     def estimate_tokens(self) -> int:
         """Rough token estimate for conversation history (~4 chars per token)."""
-        total_chars = 0
-        for msg in self.conversation:
-            content = msg.get("content", "")
-            if isinstance(content, str):
-                total_chars += len(content)
-            elif isinstance(content, list):
-                for block in content:
-                    if isinstance(block, dict):
-                        total_chars += len(block.get("text", ""))
-                        total_chars += len(block.get("content", ""))
-        return total_chars // 4
+        return self._char_count // 4
 
     def _trim_history(self) -> None:
-        """Keep conversation within configured turn limit and token budget."""
-        max_turns = self.settings.claude.max_conversation_turns
-        max_messages = max_turns * 2
-
-        # Trim by turn count
-        if len(self.conversation) > max_messages:
-            excess = len(self.conversation) - max_messages
-            self.conversation = self.conversation[excess:]
-
-        # Trim by estimated tokens (keep under ~100k tokens)
-        max_tokens = 100_000
-        while len(self.conversation) > 2 and self.estimate_tokens() > max_tokens:
+        """Keep conversation within the token budget.
+
+        The turn limit is enforced by the deque's maxlen.
+        """
+        while len(self.conversation) > 2 and self.estimate_tokens() > MAX_HISTORY_TOKENS:
             # Drop oldest pair (user + assistant)
-            self.conversation = self.conversation[2:]
+            for _ in range(2):
+                self._evict(self.conversation.popleft())
+
+    def _evict(self, message: Msg) -> None:
+        """Account for a message leaving the history (the caller removes it)."""
+        self._char_count -= _content_chars(message.content)
+        if self.settings.claude.summary_model:
+            self.evicted.append(message)
 
 
 class SessionRegistry:
@@ -120,34 +238,44 @@ class SessionRegistry:
     def add(self, session: Session) -> None:
         self._sessions[session.session_id] = session
 
-    def remove(self, session_id: str) -> None:
+    async def remove(self, session_id: str) -> None:
         session = self._sessions.pop(session_id, None)
         if session:
-            session.cancel_response()
-            session.conversation.clear()
-            session.clear_audio_buffer()
+            await session.cancel_response()
+            session.clear_conversation()
+            session.release_audio_buffer()
+            if session.tool_executor is not None:
+                session.tool_executor.clear_memo_cache()
 
     def get(self, session_id: str) -> Session | None:
         return self._sessions.get(session_id)
 
-    def clear(self) -> None:
+    async def clear(self) -> None:
         for sid in list(self._sessions):
-            self.remove(sid)
+            await self.remove(sid)
 
     def __len__(self) -> int:
         return len(self._sessions)
 
     def start_cleanup(self, interval: int = 300, max_idle: int = 1800) -> asyncio.Task:
-        """Periodically remove sessions idle for longer than max_idle seconds."""
+        """Periodically remove sessions idle for longer than max_idle seconds.
+
+        Activity is tracked at sweep granularity: a session touched since the
+        previous sweep counts as active as of this one.
+        """
         async def _cleanup_loop():
             while True:
                 await asyncio.sleep(interval)
-                now = time.time()
-                stale = [
-                    sid for sid, s in self._sessions.items()
-                    if now - s.last_activity > max_idle
-                ]
+                now = _now()
+                stale = []
+                for sid, s in self._sessions.items():
+                    if s.touched:
+                        # Active at some point since the last sweep
+                        s.last_activity = now
+                        s.touched = False
+                    elif now - s.last_activity > max_idle:
+                        stale.append(sid)
                 for sid in stale:
                     log.info("Reaping stale session %s", sid)
-                    self.remove(sid)
+                    await self.remove(sid)
         return asyncio.create_task(_cleanup_loop())
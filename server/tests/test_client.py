@@ -0,0 +1,356 @@
+"""Tests for the Claude client's tool loop and history handling."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.claude.client import (
+    ClaudeClient,
+    _mark_message_for_caching,
+    _tool_batches,
+    _trim_old_tool_results,
+)
+from src.config import ClaudeConfig, Settings
+from src.ws.session import Msg, Session
+
+
+def text_block(text):
+    return SimpleNamespace(type="text", text=text)
+
+
+def tool_block(tool_id, name, tool_input):
+    return SimpleNamespace(type="tool_use", id=tool_id, name=name, input=tool_input)
+
+
+class FakeStream:
+    def __init__(self, content):
+        self.content = content
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        for block in self.content:
+            if block.type == "text":
+                yield SimpleNamespace(
+                    type="content_block_delta",
+                    delta=SimpleNamespace(type="text_delta", text=block.text),
+                )
+
+    async def get_final_message(self):
+        return SimpleNamespace(content=self.content)
+
+
+class FakeMessages:
+    """Plays back one scripted reply per API round, recording each request."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requests = []
+
+    def stream(self, **kwargs):
+        self.requests.append(kwargs)
+        return FakeStream(self.replies.pop(0))
+
+
+class BlockingExecutor:
+    """Tool executor whose calls wait until released."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    def clear_memo_cache(self):
+        pass
+
+    async def execute(self, name, tool_input):
+        self.started.set()
+        await self.release.wait()
+        return {"success": True, "output": f"{name} done"}
+
+
+def make_client(*replies):
+    client = ClaudeClient("key", "model", 1024, tool_executor=BlockingExecutor())
+    client.client = SimpleNamespace(messages=FakeMessages(*replies))
+    return client
+
+
+def make_session(text="do the thing"):
+    session = Session(settings=Settings(claude=ClaudeConfig(summary_model="")))
+    session.workspace_name = "ws"
+    session.add_user_parts([{"type": "text", "text": text}])
+    return session
+
+
+def assert_tool_calls_answered(session):
+    """Every tool_use in the history has a tool_result in the next message."""
+    messages = list(session.conversation)
+    for i, msg in enumerate(messages):
+        calls = {b["id"] for b in msg.content if b.get("type") == "tool_use"}
+        if not calls:
+            continue
+        reply = messages[i + 1]
+        assert reply.role == "user"
+        assert {b["tool_use_id"] for b in reply.content} == calls
+
+
+async def test_cancel_during_tool_run_answers_every_tool_use():
+    client = make_client([tool_block("tu_1", "read_file", {"path": "a"})])
+    session = make_session()
+
+    async def consume():
+        async for _event in client.stream_response(session):
+            pass
+
+    task = asyncio.create_task(consume())
+    await client.executor.started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert [msg.role for msg in session.conversation] == ["user", "assistant", "user"]
+    assert_tool_calls_answered(session)
+    result = session.conversation[-1].content[0]
+    assert result["is_error"]
+
+
+async def test_consumer_stopping_at_tool_use_event_answers_every_tool_use():
+    client = make_client([
+        tool_block("tu_1", "read_file", {"path": "a"}),
+        tool_block("tu_2", "bash", {"command": "make"}),
+    ])
+    session = make_session()
+    stream = client.stream_response(session)
+    event = await stream.__anext__()
+    assert event["type"] == "tool_use"
+    await stream.aclose()
+
+    assert_tool_calls_answered(session)
+    assert all(b["is_error"] for b in session.conversation[-1].content)
+
+
+async def test_finished_tools_keep_their_results_when_interrupted():
+    client = make_client(
+        [tool_block("tu_1", "read_file", {"path": "a"})],
+        [tool_block("tu_2", "bash", {"command": "make"})],
+    )
+    client.executor.release.set()
+    session = make_session()
+    stream = client.stream_response(session)
+    async for event in stream:
+        if event["type"] == "tool_result":
+            break  # the handler stops like this on interrupt
+    await stream.aclose()
+
+    assert_tool_calls_answered(session)
+    result = session.conversation[-1].content[0]
+    assert result == {
+        "type": "tool_result",
+        "tool_use_id": "tu_1",
+        "content": "read_file done",
+        "is_error": False,
+    }
+
+
+async def test_response_cache_replays_opening_turn():
+    client = make_client([text_block("<speak>Hello!</speak>")])
+    first = make_session("Hello there")
+    events = [event async for event in client.stream_response(first)]
+    assert events[0] == {"type": "text_delta", "text": "<speak>Hello!</speak>"}
+
+    second = make_session("hello, there!")
+    events = [event async for event in client.stream_response(second)]
+    assert events[0] == {"type": "text_delta", "text": "<speak>Hello!</speak>"}
+    assert len(client.client.messages.requests) == 1
+    assert second.conversation[-1].role == "assistant"
+
+
+async def test_response_cache_skips_later_turns():
+    client = make_client(
+        [text_block("Hi")], [text_block("Sure")], [text_block("Again")],
+    )
+    session = make_session("hello")
+    [event async for event in client.stream_response(session)]
+    session.add_user_parts([{"type": "text", "text": "yes"}])
+    [event async for event in client.stream_response(session)]
+
+    other = make_session("hello")
+    other.add_assistant_message([{"type": "text", "text": "Hi"}])
+    other.add_user_parts([{"type": "text", "text": "yes"}])
+    [event async for event in client.stream_response(other)]
+    assert len(client.client.messages.requests) == 3
+
+
+def test_tool_batches_group_consecutive_reads():
+    blocks = [
+        tool_block("1", "read_file", {}),
+        tool_block("2", "grep", {}),
+        tool_block("3", "edit_file", {}),
+        tool_block("4", "glob", {}),
+        tool_block("5", "list_directory", {}),
+        tool_block("6", "bash", {}),
+        tool_block("7", "bash", {}),
+        tool_block("8", "read_file", {}),
+    ]
+    assert [[b.id for b in batch] for batch in _tool_batches(blocks)] == [
+        ["1", "2"], ["3"], ["4", "5"], ["6"], ["7"], ["8"],
+    ]
+
+
+async def test_tool_results_keep_call_order():
+    client = make_client(
+        [
+            tool_block("tu_1", "read_file", {"path": "a"}),
+            tool_block("tu_2", "grep", {"pattern": "x"}),
+            tool_block("tu_3", "bash", {"command": "make"}),
+        ],
+        [text_block("done")],
+    )
+    client.executor.release.set()
+    session = make_session()
+    events = [event async for event in client.stream_response(session)]
+
+    assert [e["tool_id"] for e in events if e["type"] == "tool_use"] == ["tu_1", "tu_2", "tu_3"]
+    assert [e["tool_id"] for e in events if e["type"] == "tool_result"] == ["tu_1", "tu_2", "tu_3"]
+    results = session.conversation[2].content
+    assert [r["tool_use_id"] for r in results] == ["tu_1", "tu_2", "tu_3"]
+
+
+BIG = "x" * 5000
+
+
+def tool_round(history, tool_id, output=BIG):
+    history.append(Msg("assistant", [
+        {"type": "tool_use", "id": tool_id, "name": "read_file", "input": {}},
+    ]))
+    history.append(Msg("user", [
+        {"type": "tool_result", "tool_use_id": tool_id, "content": output},
+    ]))
+
+
+def user_turn(history, text):
+    history.append(Msg("user", [{"type": "text", "text": text}]))
+    history.append(Msg("assistant", [{"type": "text", "text": "ok"}]))
+
+
+def result_sizes(messages):
+    return [
+        len(block["content"])
+        for msg in messages for block in msg["content"]
+        if block.get("type") == "tool_result"
+    ]
+
+
+def test_trim_keeps_the_last_two_turns_in_full():
+    history = []
+    for turn in range(4):
+        history.append(Msg("user", [{"type": "text", "text": f"turn {turn}"}]))
+        tool_round(history, f"tu_{turn}")
+        history.append(Msg("assistant", [{"type": "text", "text": "done"}]))
+    messages = _trim_old_tool_results(history, keep_head=0, max_chars=100)
+    sizes = result_sizes(messages)
+    assert sizes[2:] == [5000, 5000]
+    assert all(size < 200 for size in sizes[:2])
+    # Session history is untouched
+    assert history[2].content[0]["content"] == BIG
+
+
+def test_trim_prefix_is_stable_across_rounds_of_a_turn():
+    history = []
+    user_turn(history, "first")
+    history.append(Msg("user", [{"type": "text", "text": "second"}]))
+    tool_round(history, "tu_1")
+    history.append(Msg("assistant", [{"type": "text", "text": "done"}]))
+    history.append(Msg("user", [{"type": "text", "text": "third"}]))
+    tool_round(history, "tu_2")
+    before = _trim_old_tool_results(history, keep_head=0, max_chars=100)
+
+    for i in range(3, 6):
+        tool_round(history, f"tu_{i}")
+        after = _trim_old_tool_results(history, keep_head=0, max_chars=100)
+        assert after[:len(before)] == before
+        before = after
+
+
+def test_trim_never_restores_a_truncated_result():
+    history = []
+    seen_truncated = set()
+    for turn in range(5):
+        history.append(Msg("user", [{"type": "text", "text": f"turn {turn}"}]))
+        tool_round(history, f"tu_{turn}")
+        history.append(Msg("assistant", [{"type": "text", "text": "done"}]))
+        messages = _trim_old_tool_results(history, keep_head=0, max_chars=100)
+        truncated = {
+            block["tool_use_id"]
+            for msg in messages for block in msg["content"]
+            if block.get("type") == "tool_result" and len(block["content"]) < 200
+        }
+        assert seen_truncated <= truncated
+        seen_truncated = truncated
+
+
+def test_trim_drops_leading_messages_before_a_turn_start():
+    history = []
+    tool_round(history, "tu_orphan")  # its turn start was evicted
+    user_turn(history, "hello")
+    messages = _trim_old_tool_results(history)
+    assert messages[0] == {"role": "user", "content": [{"type": "text", "text": "hello"}]}
+    assert _trim_old_tool_results(history[:2]) == []
+
+
+def cache_markers(messages):
+    return [
+        (i, j)
+        for i, msg in enumerate(messages)
+        for j, block in enumerate(msg["content"])
+        if "cache_control" in block
+    ]
+
+
+def test_mark_message_for_caching_marks_a_copy_of_the_last_block():
+    history = [
+        Msg("user", [{"type": "text", "text": "hi"}]),
+        Msg("assistant", [{"type": "text", "text": "a"}, {"type": "text", "text": "b"}]),
+    ]
+    messages = [msg.as_dict() for msg in history]
+    marked = _mark_message_for_caching(messages)
+
+    assert cache_markers(marked) == [(1, 1)]
+    assert marked[1]["content"][1]["cache_control"] == {"type": "ephemeral"}
+    assert cache_markers(messages) == []
+    assert all("cache_control" not in b for msg in history for b in msg.content)
+
+
+def test_mark_message_for_caching_string_and_empty_content():
+    marked = _mark_message_for_caching([{"role": "user", "content": "hello"}])
+    assert marked == [{"role": "user", "content": [
+        {"type": "text", "text": "hello", "cache_control": {"type": "ephemeral"}},
+    ]}]
+    assert _mark_message_for_caching([]) == []
+    empty = [{"role": "user", "content": []}]
+    assert _mark_message_for_caching(empty) == empty
+
+
+async def test_one_cache_marker_per_request_and_none_in_history():
+    client = make_client(
+        [tool_block("tu_1", "read_file", {"path": "a"})],
+        [tool_block("tu_2", "grep", {"pattern": "x"})],
+        [text_block("done")],
+    )
+    client.executor.release.set()
+    session = make_session()
+    [event async for event in client.stream_response(session)]
+
+    requests = client.client.messages.requests
+    assert len(requests) == 3
+    for request in requests:
+        messages = request["messages"]
+        assert cache_markers(messages) == [(len(messages) - 1, len(messages[-1]["content"]) - 1)]
+    assert all("cache_control" not in b for msg in session.conversation for b in msg.content)
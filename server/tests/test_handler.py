@@ -0,0 +1,54 @@
+"""Tests for ConnectionHandler response streaming."""
+
+import asyncio
+import json
+
+from src.config import ClaudeConfig, Settings
+from src.ws.handler import DELTA_FLUSH_INTERVAL, ConnectionHandler
+from src.ws.session import Session
+
+
+class FakeWebSocket:
+    """Records frames; the first send is slow, so overlapping sends reorder."""
+
+    def __init__(self):
+        self.sent = []
+        self.sends = 0
+
+    async def send_text(self, text):
+        self.sends += 1
+        if self.sends == 1:
+            await asyncio.sleep(0.05)
+        self.sent.append(json.loads(text))
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+class PausingClaude:
+    """Streams a few deltas, pausing long enough for the flush timer to fire."""
+
+    async def stream_response(self, session, executor=None):
+        yield {"type": "text_delta", "text": "one "}
+        await asyncio.sleep(DELTA_FLUSH_INTERVAL * 2)  # timer flush starts
+        for word in ["two ", "three ", "four"]:
+            yield {"type": "text_delta", "text": word}
+        yield {"type": "response_complete"}
+
+    async def summarize_evicted(self, session):
+        pass
+
+
+def make_handler(claude):
+    session = Session(settings=Settings(claude=ClaudeConfig(summary_model="")))
+    return ConnectionHandler(FakeWebSocket(), session, claude)
+
+
+async def test_timed_and_inline_flushes_keep_frame_order():
+    handler = make_handler(PausingClaude())
+    await handler._run_claude_response()
+
+    frames = handler.ws.sent
+    assert frames[-1] == {"type": "response_end"}
+    text = "".join(f["text"] for f in frames if f["type"] == "response_delta")
+    assert text == "one two three four"
@@ -0,0 +1,72 @@
+"""Tests for PathSandbox."""
+
+import os
+
+import pytest
+
+from src.utils.safety import PathSandbox
+
+
+@pytest.fixture
+def sandbox(tmp_path):
+    root = tmp_path / "workspace"
+    root.mkdir()
+    (root / "src").mkdir()
+    (root / "src" / "main.py").write_text("print('hi')\n")
+    return PathSandbox(root)
+
+
+def test_relative_path_resolves_inside(sandbox):
+    assert sandbox.resolve("src/main.py") == sandbox.root / "src" / "main.py"
+
+
+def test_root_itself_is_allowed(sandbox):
+    assert sandbox.resolve("") == sandbox.root
+    assert sandbox.resolve(".") == sandbox.root
+
+
+def test_dotdot_inside_root_is_allowed(sandbox):
+    assert sandbox.resolve("src/../src/main.py") == sandbox.root / "src" / "main.py"
+
+
+@pytest.mark.parametrize("path", ["..", "../secret", "src/../../secret", "../../etc/passwd"])
+def test_dotdot_escape_is_rejected(sandbox, path):
+    with pytest.raises(ValueError, match="escapes sandbox"):
+        sandbox.resolve(path)
+
+
+def test_sibling_with_root_as_prefix_is_rejected(sandbox):
+    sibling = sandbox.root.parent / (sandbox.root.name + "-other")
+    sibling.mkdir()
+    with pytest.raises(ValueError):
+        sandbox.resolve(f"../{sibling.name}/file")
+
+
+def test_absolute_path_inside_root(sandbox):
+    path = str(sandbox.root / "src" / "main.py")
+    assert sandbox.resolve(path) == sandbox.root / "src" / "main.py"
+
+
+def test_absolute_path_outside_root_is_taken_as_relative(sandbox):
+    assert sandbox.resolve("/etc/passwd") == sandbox.root / "etc" / "passwd"
+
+
+def test_symlink_out_of_workspace_is_rejected(sandbox, tmp_path):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "secret.txt").write_text("secret\n")
+    os.symlink(outside, sandbox.root / "link")
+    with pytest.raises(ValueError, match="escapes sandbox"):
+        sandbox.resolve("link/secret.txt")
+    os.symlink(outside / "secret.txt", sandbox.root / "file_link")
+    with pytest.raises(ValueError):
+        sandbox.resolve("file_link")
+
+
+def test_symlink_within_workspace_is_followed(sandbox):
+    os.symlink(sandbox.root / "src", sandbox.root / "alias")
+    assert sandbox.resolve("alias/main.py") == sandbox.root / "src" / "main.py"
+
+
+def test_resolve_str(sandbox):
+    assert sandbox.resolve_str("src") == str(sandbox.root / "src")
@@ -0,0 +1,61 @@
+"""Tests for SentenceBuffer, the TTS sentence splitter."""
+
+from src.tts.openai_tts import SentenceBuffer
+
+
+def split(*chunks: str, min_chars: int = 10) -> list[str]:
+    buf = SentenceBuffer(min_chars=min_chars)
+    sentences = []
+    for chunk in chunks:
+        sentences.extend(buf.feed(chunk))
+    rest = buf.flush()
+    if rest:
+        sentences.append(rest)
+    return sentences
+
+
+def test_splits_on_terminal_punctuation():
+    assert split("This is one sentence. Is this another? Yes it is!") == [
+        "This is one sentence.",
+        "Is this another?",
+        "Yes it is!",
+    ]
+
+
+def test_boundary_needs_following_whitespace():
+    buf = SentenceBuffer()
+    assert buf.feed("The value is about 3.") == []
+    assert buf.feed("14 for now. Next") == ["The value is about 3.14 for now."]
+    assert buf.flush() == "Next"
+
+
+def test_sentence_split_across_chunks():
+    assert split("Hello the", "re, world", ". Second one", " here.") == [
+        "Hello there, world.",
+        "Second one here.",
+    ]
+
+
+def test_abbreviations_and_initials_do_not_split():
+    assert split("I saw Dr. Smith and J. Doe today. Then we left.") == [
+        "I saw Dr. Smith and J. Doe today.",
+        "Then we left.",
+    ]
+
+
+def test_short_sentences_are_merged_forward():
+    assert split("Ok. Sure. That sounds great to me.") == [
+        "Ok. Sure. That sounds great to me.",
+    ]
+
+
+def test_flush_returns_remainder_and_resets():
+    buf = SentenceBuffer()
+    assert buf.feed("No terminal punctuation") == []
+    assert buf.flush() == "No terminal punctuation"
+    assert buf.flush() is None
+    assert buf.feed("Fresh start here. ") == ["Fresh start here."]
+
+
+def test_flush_of_empty_buffer():
+    assert SentenceBuffer().flush() is None
@@ -0,0 +1,103 @@
+"""Tests for Session history bookkeeping."""
+
+from src.config import ClaudeConfig, Settings
+from src.ws import session as session_module
+from src.ws.session import Msg, Session
+
+
+def make_session(max_turns=3, summary_model=""):
+    return Session(settings=Settings(claude=ClaudeConfig(
+        max_conversation_turns=max_turns, summary_model=summary_model,
+    )))
+
+
+def text(value):
+    return [{"type": "text", "text": value}]
+
+
+def add_turn(session, n, size=1):
+    session.add_user_parts(text(f"u{n}".ljust(size, ".")))
+    session.add_assistant_message(text(f"a{n}".ljust(size, ".")))
+
+
+def texts(messages):
+    return [msg.content[0]["text"][:2] for msg in messages]
+
+
+def test_history_is_capped_at_max_turns():
+    session = make_session(max_turns=3)
+    for n in range(5):
+        add_turn(session, n)
+    assert session.conversation.maxlen == 6
+    assert texts(session.conversation) == ["u2", "a2", "u3", "a3", "u4", "a4"]
+
+
+def test_evicted_messages_kept_for_summary_only_when_enabled():
+    session = make_session(max_turns=2, summary_model="haiku")
+    for n in range(4):
+        add_turn(session, n)
+    assert texts(session.evicted) == ["u0", "a0", "u1", "a1"]
+
+    session = make_session(max_turns=2)
+    for n in range(4):
+        add_turn(session, n)
+    assert session.evicted == []
+
+
+def test_clear_conversation_resets_history_and_summary():
+    session = make_session(max_turns=2, summary_model="haiku")
+    for n in range(3):
+        add_turn(session, n)
+    session.summary = "earlier"
+    session.clear_conversation()
+    assert list(session.conversation) == []
+    assert session.evicted == []
+    assert session.summary == ""
+    assert session.conversation.maxlen == 4
+
+
+def test_msg_as_dict():
+    assert Msg("user", text("hi")).as_dict() == {"role": "user", "content": text("hi")}
+
+
+def recount(session):
+    return sum(session_module._content_chars(msg.content) for msg in session.conversation)
+
+
+def test_content_chars_counts_text_and_tool_results():
+    content = [
+        {"type": "text", "text": "abc"},
+        {"type": "tool_result", "tool_use_id": "t", "content": "12345"},
+        {"type": "tool_use", "id": "t", "name": "glob", "input": {"pattern": "*"}},
+    ]
+    assert session_module._content_chars(content) == 8
+    assert session_module._content_chars("hello") == 5
+
+
+def test_char_count_tracks_appends_and_evictions():
+    session = make_session(max_turns=2)
+    for n in range(5):
+        add_turn(session, n, size=n + 3)
+        assert session._char_count == recount(session)
+    session.clear_conversation()
+    assert session._char_count == 0
+    assert session.estimate_tokens() == 0
+
+
+def test_token_budget_trims_oldest_pairs(monkeypatch):
+    monkeypatch.setattr(session_module, "MAX_HISTORY_TOKENS", 100)  # ~400 chars
+    session = make_session(max_turns=50, summary_model="haiku")
+    for n in range(6):
+        add_turn(session, n, size=60)
+    # 6 turns x 120 chars: the oldest pairs go until it fits
+    assert texts(session.conversation) == ["u3", "a3", "u4", "a4", "u5", "a5"]
+    assert session._char_count == recount(session) == 360
+    assert texts(session.evicted) == ["u0", "a0", "u1", "a1", "u2", "a2"]
+
+
+def test_token_budget_keeps_the_last_pair(monkeypatch):
+    monkeypatch.setattr(session_module, "MAX_HISTORY_TOKENS", 10)
+    session = make_session()
+    add_turn(session, 0, size=500)
+    assert len(session.conversation) == 2
+    assert session.estimate_tokens() == 250
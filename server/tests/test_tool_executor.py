@@ -0,0 +1,320 @@
+"""Tests for the tool executor and its glob/grep helpers."""
+
+import asyncio
+import os
+import re
+import time
+
+import pytest
+
+from src.claude import tool_executor
+from src.claude.tool_executor import (
+    ToolExecutor,
+    _compile_hyperscan,
+    _glob_to_regex,
+    _search_file,
+)
+from src.utils.safety import PathSandbox
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    for rel in [
+        "top.py",
+        "README.md",
+        "src/main.py",
+        "src/pkg/util.py",
+        "src/pkg/deep/more.py",
+        "build/out.o",
+        "node_modules/lib/index.js",
+    ]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"{rel}\n")
+    return tmp_path
+
+
+@pytest.fixture
+def executor(workspace):
+    return ToolExecutor(PathSandbox(workspace), blocked_commands=[])
+
+
+@pytest.mark.parametrize(
+    ("pattern", "path", "matches"),
+    [
+        ("*.py", "main.py", True),
+        ("*.py", "src/main.py", False),
+        ("**/*.py", "main.py", True),
+        ("**/*.py", "src/pkg/main.py", True),
+        ("src/**", "src/pkg/main.py", True),
+        ("src/*.py", "src/pkg/main.py", False),
+        ("?.txt", "a.txt", True),
+        ("?.txt", "ab.txt", False),
+        ("?.txt", "/.txt", False),
+        ("[ab].txt", "b.txt", True),
+        ("[ab].txt", "c.txt", False),
+        ("[!ab].txt", "c.txt", True),
+        ("[!ab].txt", "a.txt", False),
+        ("[a-c].txt", "b.txt", True),
+        ("file.txt", "fileXtxt", False),
+        ("a+b.txt", "a+b.txt", True),
+    ],
+)
+def test_glob_to_regex(pattern, path, matches):
+    assert bool(_glob_to_regex(pattern).fullmatch(path)) is matches
+
+
+@pytest.mark.parametrize(
+    ("pattern", "expected"),
+    [
+        ("*.py", ["top.py"]),
+        ("src/*.py", ["src/main.py"]),
+        ("src/*/*.py", ["src/pkg/util.py"]),
+        ("**/*.py", ["src/main.py", "src/pkg/deep/more.py", "src/pkg/util.py", "top.py"]),
+        ("src/**/*.py", ["src/main.py", "src/pkg/deep/more.py", "src/pkg/util.py"]),
+        ("src/pkg/util.py", ["src/pkg/util.py"]),
+        ("build/*", ["build/out.o"]),
+        ("**/*.js", []),
+        ("missing/*.py", []),
+    ],
+)
+async def test_glob(executor, pattern, expected):
+    result = await executor.execute("glob", {"pattern": pattern})
+    assert result["success"]
+    assert result["output"] == ("\n".join(expected) or "No matches found")
+
+
+async def test_glob_reads_only_the_directories_it_needs(executor, workspace, monkeypatch):
+    for i in range(20):
+        (workspace / ".venv" / f"d{i}").mkdir(parents=True)
+    scanned = []
+    real_scandir = os.scandir
+
+    def scandir(path):
+        scanned.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(tool_executor.os, "scandir", scandir)
+    assert (await executor.execute("glob", {"pattern": "*.py"}))["output"] == "top.py"
+    assert scanned == [str(workspace)]
+    scanned.clear()
+    await executor.execute("glob", {"pattern": "src/*.py"})
+    assert scanned == [str(workspace / "src")]
+
+
+async def test_read_file(executor):
+    assert await executor.execute("read_file", {"path": "src/main.py"}) == {
+        "success": True, "output": "src/main.py\n",
+    }
+    result = await executor.execute("read_file", {"path": "nope.py"})
+    assert not result["success"]
+
+
+async def test_list_directory(executor):
+    result = await executor.execute("list_directory", {"path": "src"})
+    assert result == {"success": True, "output": "main.py\npkg/"}
+
+
+async def test_read_only_tools_run_off_the_event_loop(executor, monkeypatch):
+    real_read = tool_executor._read_file
+
+    def slow_read(*args):
+        time.sleep(0.2)
+        return real_read(*args)
+
+    monkeypatch.setattr(tool_executor, "_read_file", slow_read)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    tick_task = asyncio.create_task(ticker())
+    start = time.monotonic()
+    results = await asyncio.gather(*(
+        executor.execute("read_file", {"path": "top.py"}) for _ in range(4)
+    ))
+    elapsed = time.monotonic() - start
+    tick_task.cancel()
+
+    assert all(r["success"] for r in results)
+    assert elapsed < 0.6  # overlapped, not 4 x 0.2s
+    assert ticks > 5  # the loop kept running meanwhile
+
+
+def _alive(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="needs /proc")
+async def test_cancelled_bash_kills_the_command(executor, workspace):
+    pid_file = workspace / "pid"
+    task = asyncio.create_task(executor.execute(
+        "bash", {"command": f"sleep 30 & echo $! > {pid_file}; wait"}
+    ))
+    for _ in range(100):
+        if pid_file.exists() and pid_file.read_text().strip():
+            break
+        await asyncio.sleep(0.02)
+    pid = int(pid_file.read_text())
+    assert _alive(pid)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    for _ in range(100):
+        if not _alive(pid):
+            break
+        await asyncio.sleep(0.02)
+    assert not _alive(pid)
+
+
+async def test_glob_prefix_cannot_escape_sandbox(executor):
+    result = await executor.execute("glob", {"pattern": "../*"})
+    assert not result["success"]
+    assert "escapes sandbox" in result["output"]
+
+
+def _grep(tmp_path, content: bytes, pattern: str) -> list[str]:
+    fpath = tmp_path / "f.txt"
+    fpath.write_bytes(content)
+    return _search_file(fpath, re.compile(pattern.encode(), re.MULTILINE), tmp_path)
+
+
+def test_search_file_line_numbers(tmp_path):
+    content = b"alpha\nbeta\ngamma\nbeta again\n"
+    assert _grep(tmp_path, content, "beta") == ["f.txt:2: beta", "f.txt:4: beta again"]
+
+
+def test_search_file_first_and_last_line(tmp_path):
+    assert _grep(tmp_path, b"x1\nmid\nx2", "x") == ["f.txt:1: x1", "f.txt:3: x2"]
+
+
+def test_search_file_one_hit_per_line(tmp_path):
+    assert _grep(tmp_path, b"aaa\nb\naa\n", "a") == ["f.txt:1: aaa", "f.txt:3: aa"]
+
+
+def test_search_file_anchors_match_per_line(tmp_path):
+    assert _grep(tmp_path, b"foo\nbar\nfoobar\n", "^bar") == ["f.txt:2: bar"]
+
+
+def test_search_file_empty_matches(tmp_path):
+    assert _grep(tmp_path, b"a\n\nb\n", "^$") == ["f.txt:2: "]
+
+
+@pytest.mark.parametrize("pattern", [r"foo\s+bar", "o[^z]*z", r"\n"])
+def test_search_file_matches_do_not_span_lines(tmp_path, pattern):
+    assert _grep(tmp_path, b"foo\nbar\nbaz\r\n", pattern) == []
+
+
+def test_search_file_spanning_match_still_finds_line_match(tmp_path):
+    # The first candidate match, "oo\\n", runs from line 1 into line 2; line 2
+    # matches on its own
+    assert _grep(tmp_path, b"foo\nbo x\n", r"o\S*\s") == ["f.txt:2: bo x"]
+
+
+def test_search_file_crlf(tmp_path):
+    content = b"one\r\ntwo\r\nbaz\r\n"
+    assert _grep(tmp_path, content, "two") == ["f.txt:2: two"]
+    assert _grep(tmp_path, content, "baz$") == ["f.txt:3: baz"]
+    assert _grep(tmp_path, content, "^two$") == ["f.txt:2: two"]
+
+
+def test_search_file_skips_binary(tmp_path):
+    assert _grep(tmp_path, b"match\0\nmatch\n", "match") == []
+
+
+def test_search_file_no_match(tmp_path):
+    assert _grep(tmp_path, b"alpha\nbeta\n", "delta") == []
+
+
+def test_search_file_hyperscan_prefilter(tmp_path):
+    pytest.importorskip("hyperscan")
+    (tmp_path / "hit.txt").write_bytes(b"one\ntwo fox\nthree fix\n")
+    (tmp_path / "miss.txt").write_bytes(b"one\ntwo\n")
+    regex = re.compile(rb"f.x", re.MULTILINE)
+    db = _compile_hyperscan(rb"f.x")
+    assert db is not None
+    # The prefilter stops at the first match; every hit still comes from re
+    assert _search_file(tmp_path / "hit.txt", regex, tmp_path, db) == [
+        "hit.txt:2: two fox",
+        "hit.txt:3: three fix",
+    ]
+    assert _search_file(tmp_path / "miss.txt", regex, tmp_path, db) == []
+
+
+def test_compile_hyperscan_rejects_unsupported_patterns():
+    pytest.importorskip("hyperscan")
+    assert _compile_hyperscan(rb"(a)\1") is None
+
+
+@pytest.fixture
+def memo_executor(workspace):
+    return ToolExecutor(PathSandbox(workspace), blocked_commands=[], memoize=True)
+
+
+async def read(executor, path):
+    return (await executor.execute("read_file", {"path": path}))["output"]
+
+
+async def test_memo_serves_repeats_until_cleared(memo_executor, workspace):
+    assert await read(memo_executor, "top.py") == "top.py\n"
+    (workspace / "top.py").write_text("edited elsewhere\n")
+    assert await read(memo_executor, "top.py") == "top.py\n"
+    memo_executor.clear_memo_cache()  # start of the next user turn
+    assert await read(memo_executor, "top.py") == "edited elsewhere\n"
+
+
+async def test_write_invalidates_results_covering_the_path(memo_executor, workspace):
+    await memo_executor.execute("list_directory", {"path": "src"})
+    await read(memo_executor, "top.py")
+    (workspace / "top.py").write_text("edited elsewhere\n")
+
+    await memo_executor.execute("write_file", {"path": "src/new.py", "content": "new\n"})
+
+    # The src listing covers the written path, so it is recomputed
+    listing = await memo_executor.execute("list_directory", {"path": "src"})
+    assert "new.py" in listing["output"].split("\n")
+    # An unrelated read keeps its memoized result for the rest of the turn
+    assert await read(memo_executor, "top.py") == "top.py\n"
+
+
+async def test_bash_clears_the_whole_memo(memo_executor, workspace):
+    await read(memo_executor, "top.py")
+    await memo_executor.execute("bash", {"command": "echo changed > top.py"})
+    assert await read(memo_executor, "top.py") == "changed\n"
+
+
+async def test_failures_are_not_memoized(memo_executor, workspace):
+    assert not (await memo_executor.execute("read_file", {"path": "later.py"}))["success"]
+    (workspace / "later.py").write_text("here now\n")
+    assert await read(memo_executor, "later.py") == "here now\n"
+
+
+async def test_read_racing_a_write_is_not_memoized(memo_executor, workspace, monkeypatch):
+    started = asyncio.Event()
+    release = asyncio.Event()
+    real_to_thread = asyncio.to_thread
+
+    async def slow_to_thread(func, *args):
+        if func is tool_executor._read_file:
+            result = await real_to_thread(func, *args)
+            started.set()
+            await release.wait()
+            return result
+        return await real_to_thread(func, *args)
+
+    monkeypatch.setattr(tool_executor.asyncio, "to_thread", slow_to_thread)
+    pending = asyncio.create_task(read(memo_executor, "top.py"))
+    await started.wait()
+    await memo_executor.execute("write_file", {"path": "top.py", "content": "new\n"})
+    release.set()
+    assert await pending == "top.py\n"  # read before the write landed
+    monkeypatch.setattr(tool_executor.asyncio, "to_thread", real_to_thread)
+    assert await read(memo_executor, "top.py") == "new\n"
@@ -0,0 +1,119 @@
+"""Tests for WhisperSTT request routing and batched decoding.
+
+The model itself is replaced: these cover which path a transcription takes
+and how batched results map back to their utterances.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.stt import whisper_stt
+from src.stt.whisper_stt import WhisperSTT
+
+
+def pcm(seconds: float, value: int = 1000) -> bytes:
+    return np.full(int(seconds * 16000), value, dtype=np.int16).tobytes()
+
+
+@pytest.fixture
+def stt():
+    engine = WhisperSTT()
+    calls = SimpleNamespace(single=[], batches=[])
+
+    def transcribe_sync(audio, beam_size=5):
+        time.sleep(0.05)
+        calls.single.append(len(audio))
+        return f"single {len(audio)}"
+
+    def transcribe_batch_sync(audios):
+        time.sleep(0.05)
+        calls.batches.append([len(a) for a in audios])
+        return [f"batched {len(a)}" for a in audios]
+
+    engine._transcribe_sync = transcribe_sync
+    engine._transcribe_batch_sync = transcribe_batch_sync
+    engine.calls = calls
+    yield engine
+    if engine._batcher is not None:
+        engine._batcher.cancel()
+
+
+async def test_lone_transcription_skips_the_batch_window(stt):
+    assert await stt.transcribe(pcm(1)) == "single 16000"
+    assert stt._batcher is None
+    assert stt.calls.batches == []
+    assert stt._in_flight == 0
+
+
+async def test_transcriptions_arriving_while_busy_are_batched(stt):
+    first = asyncio.create_task(stt.transcribe(pcm(1)))
+    await asyncio.sleep(0.01)  # first is now decoding
+    rest = [asyncio.create_task(stt.transcribe(pcm(n))) for n in (2, 3, 4)]
+    results = await asyncio.gather(first, *rest)
+
+    assert results == ["single 16000", "batched 32000", "batched 48000", "batched 64000"]
+    assert stt.calls.batches == [[32000, 48000, 64000]]
+    assert stt._in_flight == 0
+
+
+async def test_partial_never_joins_a_batch(stt):
+    first = asyncio.create_task(stt.transcribe(pcm(1)))
+    await asyncio.sleep(0.01)
+    assert await stt.transcribe(pcm(2), partial=True) == "single 32000"
+    await first
+    assert stt.calls.batches == []
+
+
+def segment(start, text, no_speech_prob=0.0, avg_logprob=-0.2, compression_ratio=1.2):
+    return SimpleNamespace(
+        start=round(start, 3),
+        text=f" {text}",
+        no_speech_prob=no_speech_prob,
+        avg_logprob=avg_logprob,
+        compression_ratio=compression_ratio,
+    )
+
+
+def test_generate_batch_maps_segments_to_utterances(monkeypatch):
+    import faster_whisper.vad as vad
+
+    # Utterance 1 is silence; the others are voiced throughout
+    monkeypatch.setattr(
+        vad, "get_speech_timestamps",
+        lambda audio, options=None: [] if not audio.any() else [{"start": 0, "end": len(audio)}],
+    )
+    audios = [
+        np.full(16000, 0.1, dtype=np.float32),
+        np.zeros(8000, dtype=np.float32),
+        np.full(24000, 0.1, dtype=np.float32),
+        np.full(12345, 0.1, dtype=np.float32),
+        np.full(20000, 0.1, dtype=np.float32),
+    ]
+    seen = {}
+
+    def transcribe(audio, clip_timestamps, **kwargs):
+        seen["clips"] = clip_timestamps
+        seen["kwargs"] = kwargs
+        starts = [clip["start"] for clip in clip_timestamps]
+        return [
+            segment(starts[0], "first"),
+            segment(starts[1], "third", compression_ratio=3.0),  # would be retried
+            segment(starts[2], "fourth"),
+            segment(starts[2] + 0.5, "more"),
+            segment(starts[3], "noise", no_speech_prob=0.9, avg_logprob=-1.5),
+        ], None
+
+    engine = WhisperSTT()
+    engine._get_pipeline = lambda: SimpleNamespace(transcribe=transcribe)
+    retried = []
+    engine._transcribe_sync = lambda audio, beam_size=5: retried.append(len(audio)) or "redone"
+
+    assert engine._generate_batch(audios) == ["first", "", "redone", "fourth more", ""]
+    assert retried == [24000]
+    assert [round(c["start"] * 16000) for c in seen["clips"]] == [0, 16000, 40000, 52345]
+    assert seen["kwargs"]["beam_size"] == 5
+    assert seen["kwargs"]["compression_ratio_threshold"] == whisper_stt.COMPRESSION_RATIO_THRESHOLD